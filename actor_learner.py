@@ -0,0 +1,244 @@
+import multiprocessing as mp
+import queue
+import numpy as np
+from constants import *
+from easy_21 import Easy21
+from lfa import LFAController
+from seeding import RandomStreams
+
+class ActorLearnerMetrics(object):
+    """
+    ActorLearnerMetrics records the health of an actor-learner run.
+    """
+    def __init__(self):
+        """
+        Initializes empty metrics.
+        """
+        # queue_depth stores the number of messages waiting in the queue each time the learner takes one.
+        self.queue_depth = []
+        # policy_lag stores, for every learned episode, how many weight versions behind the learner the actor's
+        # snapshot was when the episode was played.
+        self.policy_lag = []
+        # mean_squared_errors stores the mean squared error after every learned episode, if requested.
+        self.mean_squared_errors = []
+        self.num_published = 0
+
+    def mean_queue_depth(self):
+        """
+        Returns the mean queue depth seen by the learner.
+        """
+        return np.mean(self.queue_depth) if self.queue_depth else 0.0
+
+    def mean_policy_lag(self):
+        """
+        Returns the mean policy lag of the learned episodes.
+        """
+        return np.mean(self.policy_lag) if self.policy_lag else 0.0
+
+    def max_policy_lag(self):
+        """
+        Returns the largest policy lag of the learned episodes.
+        """
+        return max(self.policy_lag) if self.policy_lag else 0
+
+
+def _shared_parameter_name(controller):
+    """
+    Returns the name of the controller attribute holding the parameters shared between learner and actors.
+    """
+    if isinstance(controller, LFAController):
+        return 'weight'
+    return 'state_action_value'
+
+
+def _counts_state_visits(controller):
+    """
+    Returns whether the controller's exploration decays with its state visit counts. LFAController explores
+    with a constant epsilon instead.
+    """
+    return not isinstance(controller, LFAController)
+
+
+def _run_actor(controller, shared_parameter, shared_state_count, shared_version, transition_queue, stop_event,
+               episodes_per_message, streams):
+    """
+    Plays Easy21 with the latest published parameters and streams the observed transitions to the learner.
+
+    Arguments:
+        controller: Local copy of the controller, used to pick actions.
+        shared_parameter (multiprocessing.Array): Parameters published by the learner.
+        shared_state_count (multiprocessing.Array): State visit counts published by the learner, guarded by the
+            lock of shared_parameter. None if the controller doesn't count state visits.
+        shared_version (multiprocessing.Value): Version of the published parameters.
+        transition_queue (multiprocessing.Queue): Queue of (version, episodes) messages to the learner.
+        stop_event (multiprocessing.Event): Set by the learner when no more episodes are needed.
+        episodes_per_message (int): Number of episodes sent in a single message.
+        streams (RandomStreams): Random streams of the actor.
+    """
+    controller.rng = streams.controller()
+    env = Easy21(controller.rules, streams.environment())
+    parameter = getattr(controller, _shared_parameter_name(controller))
+    published = np.frombuffer(shared_parameter.get_obj()).reshape(parameter.shape)
+    if shared_state_count is not None:
+        published_state_count = np.frombuffer(shared_state_count).reshape(controller.state_count.shape)
+
+    while not stop_event.is_set():
+        # take a snapshot of the latest published parameters and visit counts. The actor counts its own visits
+        # on top of them until the next snapshot, so exploration decays with the visits of all the actors.
+        with shared_parameter.get_lock():
+            version = shared_version.value
+            parameter[...] = published
+            if shared_state_count is not None:
+                controller.state_count[...] = published_state_count
+
+        episodes = []
+        for _ in range(episodes_per_message):
+            transitions = []
+            prev_state = env.initialize_game()
+            prev_action = controller.get_action(prev_state)
+            while prev_state.is_terminal() == False:
+                curr_state, reward = env.step(prev_state, prev_action)
+                curr_action = controller.get_action(curr_state)
+                transitions.append((prev_state, prev_action, curr_state, curr_action, reward))
+                prev_state, prev_action = curr_state, curr_action
+            episodes.append(transitions)
+
+        # block while the queue is full, but give up once the learner is done.
+        while not stop_event.is_set():
+            try:
+                transition_queue.put((version, episodes), timeout=0.1)
+                break
+            except queue.Full:
+                continue
+
+    # the learner stops reading once it is done, so don't wait for unread messages to be flushed.
+    transition_queue.cancel_join_thread()
+
+
+class ActorLearner(object):
+    """
+    ActorLearner trains a SarsaController or LFAController with several actor processes generating experience
+    and a single learner applying the controller's update rule. Actors read the latest parameters (the Q table
+    or the LFA weight) from shared memory and stream transitions to the learner through a bounded queue. The
+    learner runs in the calling process and publishes its parameters every publish_interval episodes.
+
+    The single learner is the throughput bottleneck: applying an update costs about as much as playing the
+    episode, so adding actors doesn't speed up training and only fills the queue. Messages waiting in the queue
+    were played with an older policy, so the queue is kept short to bound the policy lag of the learned episodes.
+
+    For controllers whose exploration decays with state visits, the learner also counts the state visits of
+    the learned episodes and publishes them with the parameters, so the epsilon-greedy exploration of the
+    actors decays as in single-process training and the returned controller keeps consistent state counts.
+    """
+    def __init__(self, controller, num_actors=NUM_ACTORS, queue_size=ACTOR_QUEUE_SIZE,
+                 publish_interval=PUBLISH_INTERVAL, episodes_per_message=EPISODES_PER_MESSAGE, seed=None):
+        """
+        Initialize an actor-learner for the provided controller.
+
+        Arguments:
+            controller (SarsaController or LFAController): The controller to train.
+            num_actors (int): Number of actor processes.
+            queue_size (int): Maximum number of messages waiting in the transition queue.
+            publish_interval (int): Number of learned episodes between two parameter publications.
+            episodes_per_message (int): Number of episodes an actor sends in a single message.
+            seed (int or np.random.SeedSequence): Seed the actors' random streams are split from.
+        """
+        self.controller = controller
+        self.num_actors = num_actors
+        self.queue_size = queue_size
+        self.publish_interval = publish_interval
+        self.episodes_per_message = episodes_per_message
+        self.seed = seed
+
+    def run(self, num_episodes, optimal_state_action_value=None):
+        """
+        Trains the controller for the provided number of episodes.
+
+        Arguments:
+            num_episodes (int): Number of episodes to learn from.
+            optimal_state_action_value (numpy 3d array): If provided, the mean squared error of the controller
+                w.r.t these values is recorded after every learned episode.
+
+        Returns:
+            metrics (ActorLearnerMetrics): Queue depth, policy lag and error metrics of the run.
+        """
+        metrics = ActorLearnerMetrics()
+        parameter = getattr(self.controller, _shared_parameter_name(self.controller))
+        shared_parameter = mp.Array('d', parameter.size)
+        shared_version = mp.Value('i', 0, lock=False)
+        published = np.frombuffer(shared_parameter.get_obj()).reshape(parameter.shape)
+        published[...] = parameter
+        counts_state_visits = _counts_state_visits(self.controller)
+        shared_state_count = None
+        if counts_state_visits:
+            shared_state_count = mp.Array('d', self.controller.state_count.size, lock=False)
+            published_state_count = np.frombuffer(shared_state_count).reshape(self.controller.state_count.shape)
+            published_state_count[...] = self.controller.state_count
+
+        transition_queue = mp.Queue(maxsize=self.queue_size)
+        stop_event = mp.Event()
+        actor_streams = RandomStreams(self.seed).spawn(self.num_actors)
+        actors = [mp.Process(target=_run_actor,
+                             args=(self.controller, shared_parameter, shared_state_count, shared_version,
+                                   transition_queue, stop_event, self.episodes_per_message, actor_streams[i]),
+                             daemon=True)
+                  for i in range(self.num_actors)]
+        for actor in actors:
+            actor.start()
+
+        try:
+            num_learned = 0
+            while num_learned < num_episodes:
+                try:
+                    metrics.queue_depth.append(transition_queue.qsize())
+                except NotImplementedError:
+                    # qsize is not available on every platform (e.g. macOS).
+                    pass
+                version, episodes = self._get_message(transition_queue, actors)
+
+                for transitions in episodes:
+                    if num_learned == num_episodes:
+                        break
+                    self.controller.clear_eligibility_traces()
+                    for prev_state, prev_action, curr_state, curr_action, reward in transitions:
+                        if counts_state_visits:
+                            # every transition starts from a non-terminal state the actor picked an action for.
+                            self.controller.state_count[prev_state.dealer_card.get_num_value()][
+                                prev_state.player_card_sum] += 1
+                        self.controller.update_policy(prev_state, prev_action, curr_state, curr_action, reward)
+                    num_learned += 1
+                    metrics.policy_lag.append(metrics.num_published - version)
+                    if optimal_state_action_value is not None:
+                        metrics.mean_squared_errors.append(
+                            self.controller.compute_mean_squared_error(optimal_state_action_value))
+
+                    # publish the learner's parameters to the actors.
+                    if num_learned % self.publish_interval == 0:
+                        metrics.num_published += 1
+                        with shared_parameter.get_lock():
+                            published[...] = parameter
+                            if counts_state_visits:
+                                published_state_count[...] = self.controller.state_count
+                            shared_version.value = metrics.num_published
+        finally:
+            stop_event.set()
+            for actor in actors:
+                actor.join()
+            transition_queue.close()
+
+        return metrics
+
+    def _get_message(self, transition_queue, actors):
+        """
+        Returns the next message of the transition queue. Raises a RuntimeError instead of waiting forever if an
+        actor failed or every actor exited.
+        """
+        while True:
+            try:
+                return transition_queue.get(timeout=ACTOR_POLL_INTERVAL)
+            except queue.Empty:
+                failed = [actor for actor in actors if actor.exitcode not in (None, 0)]
+                if failed:
+                    raise RuntimeError('Actor {} exited with code {}'.format(failed[0].name, failed[0].exitcode))
+                if all(actor.exitcode is not None for actor in actors):
+                    raise RuntimeError('All actors exited before the learner was done')
@@ -1,30 +1,38 @@
 import numpy as np
 from constants import *
 from colors import Color
+from rules import DEFAULT_RULES
+import seeding
 
 class Card(object):
     """
     Card represents a card being used to playe the Easy21 game. A card has two attributes: number value
-    (between 1 to 10) and a color (red or black).
+    (between 1 to 10 by default) and a color (red or black).
     """
-    def __init__(self, color=None):
+    def __init__(self, color=None, rules=DEFAULT_RULES, rng=None):
         """
         Intitalizates a new card.
+
+        Arguments:
+            color (Color): Color of the card, if not provided the color is chosen randomly.
+            rules (Easy21Rules): Rules defining the card deck.
+            rng (np.random.Generator): Generator used to draw the card, the shared default generator if not
+                provided.
         """
-        self._num_value = np.random.choice(np.arange(1, 11))
+        if rng is None:
+            rng = seeding.default_rng()
+        self._num_value = int(rng.integers(rules.min_card_value, rules.max_card_value + 1))
         
         # set color if provided, if not choose randomly.
         if color == None:
-            color = self._get_color()
+            color = self._get_color(rules, rng)
         self._color = color
     
-    def _get_color(self):
+    def _get_color(self, rules, rng):
         """
         Returns a card color chosen randomly
         """
-        color =  np.random.choice(np.arange(NUM_CARD_TYPE), 
-                            p=np.array([BLACK_PROBABILITY, RED_PROBABILITY]))
-        return Color(color)
+        return Color.RED if rng.random() < rules.red_probability else Color.BLACK
     
     def get_num_value(self):
         """
@@ -44,4 +52,29 @@ class Card(object):
         """
         Return the card color.
         """
-        return self._color
\ No newline at end of file
+        return self._color
+
+
+def draw_card_values(size, color=None, rules=DEFAULT_RULES, rng=None):
+    """
+    Draws a batch of cards and returns their number values. This is the vectorized counterpart of
+    Card(color, rules, rng).get_num_value() and follows the same card distribution.
+
+    Arguments:
+        size (int): Number of cards to draw.
+        color (Color): Color of the cards, if not provided the color of each card is chosen randomly.
+        rules (Easy21Rules): Rules defining the card deck.
+        rng (np.random.Generator): Generator used to draw the cards, the shared default generator if not provided.
+
+    Returns:
+        values (numpy 1d array): Number values of the drawn cards: +ve if black, -ve if red.
+    """
+    if rng is None:
+        rng = seeding.default_rng()
+    values = rng.integers(rules.min_card_value, rules.max_card_value + 1, size=size)
+    if color is None:
+        red = rng.random(size) < rules.red_probability
+        return np.where(red, -values, values)
+    if color == Color.RED:
+        return -values
+    return values
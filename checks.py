@@ -0,0 +1,214 @@
+from easy_21 import Easy21
+from actions import Action
+from sarsa import SarsaController
+from actor_learner import ActorLearner
+from rules import DEFAULT_RULES
+import distributed
+from distributed import (SweepJob, SweepCoordinator, SweepResult, run_job, run_worker, _send_frame, _recv_frame,
+                         MSG_HELLO, MSG_JOB, MSG_RESULT)
+from constants import *
+import multiprocessing as mp
+import socket
+import threading
+import time
+import numpy as np
+
+# Sanity checks of properties that the experiments rely on but that are easy to break silently.
+
+def threshold_policy(threshold, rules=DEFAULT_RULES):
+    """
+    Returns the policy hitting while the player card sum is below the provided threshold.
+    """
+    policy = np.full(rules.states, Action.STICK, dtype=np.int64)
+    policy[:, :threshold] = Action.HIT
+    return policy
+
+
+def check_common_random_numbers(num_games=100000, seed=0):
+    """
+    Checks that two policies played from batched environments with the same seed have identical outcomes in
+    every game that never reaches the state where they differ.
+    """
+    policy = threshold_policy(17)
+    other_policy = policy.copy()
+    other_policy[5, 16] = Action.STICK
+
+    rewards, visited = Easy21(seed=seed).play_policy_batch(policy, num_games, visits=True)
+    other_rewards, other_visited = Easy21(seed=seed).play_policy_batch(other_policy, num_games, visits=True)
+    reached = visited[:, 5, 16]
+    assert np.array_equal(reached, other_visited[:, 5, 16])
+    assert np.array_equal(rewards[~reached], other_rewards[~reached])
+    print(f'Common random numbers: {np.mean(rewards != other_rewards):.2%} of the games differ, '
+          f'{np.mean(reached):.2%} reach the differing state')
+
+
+def _run_scripted_worker(host, port, stall=False, duplicate=False):
+    """
+    Runs a worker speaking the sweep protocol directly, without heartbeats. A stalling worker goes silent once it
+    gets a job and reconnects after the coordinator drops it. A duplicating worker sends every result twice.
+    """
+    while True:
+        try:
+            sock = socket.create_connection((host, port))
+        except OSError:
+            # the coordinator is done.
+            return
+        with sock:
+            try:
+                _send_frame(sock, MSG_HELLO)
+                _recv_frame(sock)
+                while True:
+                    msg_type, payload = _recv_frame(sock)
+                    if msg_type != MSG_JOB:
+                        return
+                    job_id, job = SweepJob.decode(payload)
+                    if stall:
+                        # blocks till the coordinator gives up on the worker and closes the connection.
+                        _recv_frame(sock)
+                    parameters, errors = run_job(job)
+                    for _ in range(2 if duplicate else 1):
+                        _send_frame(sock, MSG_RESULT, SweepResult.encode(job_id, parameters, errors))
+            except (OSError, ConnectionError):
+                if not stall:
+                    return
+
+
+def check_worker_loss(num_episodes=500):
+    """
+    Checks on localhost that a sweep finishes every job exactly once when a worker is killed mid-job and another
+    sends duplicate results, and that the results match running the jobs directly.
+    """
+    jobs = [SweepJob('sarsa', 0.5, seed, num_episodes, num_episodes) for seed in range(4)]
+    # the scripted worker sends no heartbeats, the timeout leaves it time to finish its jobs.
+    coordinator = SweepCoordinator(jobs, heartbeat_timeout=10.0)
+    host, port = coordinator.address
+    results = {}
+    sweep = threading.Thread(target=lambda: results.update(coordinator.run()))
+    sweep.start()
+
+    # kill the first worker as soon as it got a job.
+    lost_worker = mp.Process(target=run_worker, args=(host, port), daemon=True)
+    lost_worker.start()
+    while coordinator._attempts[0] == 0:
+        time.sleep(0.01)
+    lost_worker.kill()
+    workers = [mp.Process(target=run_worker, args=(host, port), daemon=True),
+               threading.Thread(target=_run_scripted_worker, args=(host, port), kwargs={'duplicate': True},
+                                daemon=True)]
+    for worker in workers:
+        worker.start()
+    sweep.join()
+    for worker in workers:
+        worker.join()
+
+    assert sorted(results) == list(range(len(jobs))) and not coordinator.failed
+    assert coordinator._attempts == [2] + [1]*(len(jobs) - 1)
+    for job_id, job in enumerate(jobs):
+        assert results[job_id].job is job
+        assert np.array_equal(results[job_id].parameters, run_job(job)[0])
+    print(f'Worker loss: {len(results)} jobs done once each, attempts {coordinator._attempts}')
+
+
+def check_max_retries(max_retries=1):
+    """
+    Checks on localhost that a job is marked failed once its workers stalled more than max_retries times.
+    """
+    jobs = [SweepJob('sarsa', 0.5, 0, 10, 10)]
+    coordinator = SweepCoordinator(jobs, heartbeat_timeout=0.5, max_retries=max_retries)
+    host, port = coordinator.address
+    worker = threading.Thread(target=_run_scripted_worker, args=(host, port), kwargs={'stall': True},
+                              daemon=True)
+    worker.start()
+    results = coordinator.run()
+    worker.join()
+
+    assert not results and coordinator.failed == {0}
+    assert coordinator._attempts[0] == max_retries + 1
+    print(f'Max retries: job failed after {coordinator._attempts[0]} attempts')
+
+
+def _run_failing_worker(host, port):
+    """
+    Runs a sweep worker whose training raises a ZeroDivisionError on jobs with seed 0.
+    """
+    original_run_job = distributed.run_job
+    def run_job(job, optimal_state_action_value=None):
+        if job.seed == 0:
+            raise ZeroDivisionError('integer modulo by zero')
+        return original_run_job(job, optimal_state_action_value)
+    distributed.run_job = run_job
+    run_worker(host, port)
+
+
+def check_failing_job(num_workers=2, max_retries=3):
+    """
+    Checks on localhost that jobs raising an error on their worker are failed once, without retries or losing the
+    workers, while the other jobs still finish. Also checks that jobs the protocol can't carry are rejected.
+    """
+    for seed, num_episodes, mse_interval in ((-1, 10, 1), (2**32, 10, 1), (0, 0, 1), (0, 10, 0)):
+        try:
+            SweepJob('sarsa', 0.5, seed, num_episodes, mse_interval)
+        except ValueError:
+            continue
+        raise AssertionError('Invalid job {} was accepted'.format((seed, num_episodes, mse_interval)))
+
+    invalid_job = SweepJob('sarsa', 0.5, 2, 10, 5)
+    # bypass the validation, the worker then fails to decode the job.
+    invalid_job.mse_interval = 0
+    jobs = [SweepJob('sarsa', 0.5, 0, 10, 5), SweepJob('sarsa', 0.5, 1, 10, 5), invalid_job]
+    coordinator = SweepCoordinator(jobs, max_retries=max_retries)
+    host, port = coordinator.address
+    workers = [mp.Process(target=_run_failing_worker, args=(host, port), daemon=True)
+               for _ in range(num_workers)]
+    for worker in workers:
+        worker.start()
+    results = coordinator.run()
+    for worker in workers:
+        worker.join()
+
+    assert sorted(results) == [1] and coordinator.failed == {0, 2}
+    assert coordinator._attempts == [1, 1, 1]
+    assert 'ZeroDivisionError' in coordinator.errors[0] and 'ValueError' in coordinator.errors[2]
+    assert all(worker.exitcode == 0 for worker in workers)
+    print(f'Failing job: jobs {sorted(coordinator.failed)} failed once, other jobs done')
+
+
+class _FailingController(SarsaController):
+    """
+    SarsaController whose actors fail on their first action.
+    """
+    def get_action(self, state):
+        raise RuntimeError('actor failure')
+
+
+def check_actor_learner(num_episodes=300, num_actors=2, queue_size=2):
+    """
+    Checks that an actor-learner run keeps the learner's state visit counts consistent, bounds the policy lag
+    by the queue size and stops its actors, and that a failing actor stops the run with an error.
+    """
+    actor_learner = ActorLearner(SarsaController(lmbda=0.5), num_actors=num_actors, queue_size=queue_size,
+                                 seed=0)
+    metrics = actor_learner.run(num_episodes)
+    controller = actor_learner.controller
+    assert np.sum(controller.state_count) == np.sum(controller.state_action_count) > 0
+    # a learned episode was played at most a full queue plus one message per actor before it is learned.
+    max_lag = 2*(queue_size + num_actors + 1)*actor_learner.episodes_per_message//actor_learner.publish_interval
+    assert metrics.max_policy_lag() <= max_lag
+    assert not mp.active_children()
+
+    try:
+        ActorLearner(_FailingController(), num_actors=num_actors, seed=0).run(num_episodes)
+    except RuntimeError as e:
+        assert 'exited with code' in str(e)
+    else:
+        raise AssertionError('Failing actors did not stop the run')
+    assert not mp.active_children()
+    print(f'Actor-learner: max policy lag {metrics.max_policy_lag()} <= {max_lag}, failing actors stop the run')
+
+
+if __name__ == '__main__':
+    check_common_random_numbers()
+    check_worker_loss()
+    check_max_retries()
+    check_failing_job()
+    check_actor_learner()
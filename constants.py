@@ -25,13 +25,54 @@ FEATURE_DIM = (36, 1)
 DEALER_BRACKETS = [(1, 4), (4, 7), (7, 10)]
 PLAYER_BRACKETS = [(1, 6), (4, 9), (7, 12), (10, 15), (13, 18), (16, 21)]
 
+# Policy evaluation constants
+EVAL_BATCH_SIZE = 10000
+# BATCH_CARD_DRAWS is the number of cards drawn ahead for each game and hand in batched games.
+BATCH_CARD_DRAWS = 8
+EVAL_MIN_GAMES = 10000
+EVAL_MAX_GAMES = 10000000
+EVAL_CONFIDENCE = 0.95
+EVAL_TARGET_HALF_WIDTH = 0.01
+
+# Actor-learner constants
+NUM_ACTORS = 4
+# ACTOR_QUEUE_SIZE bounds the messages waiting for the learner, a deeper queue only makes them more off-policy.
+ACTOR_QUEUE_SIZE = NUM_ACTORS
+PUBLISH_INTERVAL = 10
+EPISODES_PER_MESSAGE = 10
+# ACTOR_POLL_INTERVAL is the number of seconds the learner waits for a message before checking on the actors.
+ACTOR_POLL_INTERVAL = 1.0
+
+# Distributed sweep constants
+NUM_SWEEP_WORKERS = 4
+HEARTBEAT_INTERVAL = 1.0
+HEARTBEAT_TIMEOUT = 10.0
+MAX_JOB_RETRIES = 3
+
+# Inference server constants
+INFERENCE_HOST = 'localhost'
+INFERENCE_PORT = 8021
+INFERENCE_MAX_BATCH_SIZE = 1024
+INFERENCE_MAX_DELAY = 0.001
+
+# Stress test constants
+NUM_STRESS_EPISODES = 20
+MAX_STRESS_MODEL_ENTRIES = 50000000
+
 # Experiment Constants
+# SEED is the root seed of all the random streams of an experiment, None draws fresh entropy.
+SEED = 0
+# COMMON_RANDOM_NUMBERS makes the compared controllers play the same card sequences.
+COMMON_RANDOM_NUMBERS = True
 NUM_MC_EPISODES = 1000000
 NUM_SARSA_EPISODES = 10000
 NUM_LFA_EPISODES = 10000
 
 FIG_SIZE = (8,6)
 
+# PLOT_HEATMAPS controls whether value functions are also saved as 2D heatmaps next to the 3D surfaces.
+PLOT_HEATMAPS = False
+
 PLOT_EPISODES = [1000, 10000, 100000, 500000, 1000000]
 
 LAMBDA_VALUES = [i/10 for i in range(0, 11)]
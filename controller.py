@@ -1,27 +1,36 @@
 import numpy as np
 from constants import *
 from actions import Action
+from rules import DEFAULT_RULES
+import seeding
 
 class Easy21Controller(object):
     """
     Easy21Controller defines the base controller class for Easy21 Game.
     """
-    def __init__(self):
+    def __init__(self, rules=DEFAULT_RULES, rng=None):
         """
         Initialize a controller for Easy21 Game.
+
+        Arguments:
+            rules (Easy21Rules): Rules of the game, the shapes of the controller tables are derived from them.
+            rng (np.random.Generator): Generator used for exploration, the shared default generator if not provided.
         """
+        self.rules = rules
+        self.rng = rng if rng is not None else seeding.default_rng()
+
         # intialize count for number of times a state has been encountered. This will be used to set epsilon
         # for epsilon greedy exploration.
-        self.state_count = np.zeros(STATES)
+        self.state_count = np.zeros(self.rules.states)
 
         # intialize action value function as 3D array with all zeros. The dimension of the action value
         # function will be (dealer_card_value, palyer_card_sum, num_actions). There are two actions HIT or
         # STICK.
-        self.state_action_value = np.zeros(STATE_ACTIONS)
+        self.state_action_value = np.zeros(self.rules.state_actions)
 
         # intialize count for the number of time a station action pair has been encountered. This will be
         # used to update the action value function at the end of each episode.
-        self.state_action_count = np.zeros(STATE_ACTIONS)
+        self.state_action_count = np.zeros(self.rules.state_actions)
 
         # n_0 will be used in computation of epsilon.
         self.n_0 = EPSILON_0
@@ -49,11 +58,31 @@ class Easy21Controller(object):
         epsilon = self.n_0/(self.n_0 + self.state_count[i][j])
 
         # pick epsilon greedy action.
-        if np.random.random() <= epsilon or self.state_action_value[i][j][0] == self.state_action_value[i][j][1]:
-            return Action(np.random.choice(np.arange(NUM_ACTIONS)))
+        if self.rng.random() <= epsilon or self.state_action_value[i][j][0] == self.state_action_value[i][j][1]:
+            return Action(self.rng.integers(NUM_ACTIONS))
         
         # return action with greater action value.
         return Action(np.argmax(self.state_action_value[i][j]))
 
-    def plot_value_function(self, num_episode):
+    def get_state_action_values(self):
+        """
+        Returns the state action values of the controller as a numpy array of shape rules.state_actions.
+        """
+        return self.state_action_value
+
+    def get_greedy_policy(self):
+        """
+        Returns the greedy policy of the controller frozen as an action lookup table. Ties between the
+        action values are broken in favour of Action.HIT.
+
+        Returns:
+            policy (numpy 2d array): A numpy array of shape rules.states where policy[dealer_card_value][player_card_sum]
+                is the greedy action for that state.
+        """
+        return np.argmax(self.state_action_value, axis=2)
+
+    def get_value_function_plot(self, num_episode):
+        raise NotImplementedError("get_value_function_plot not implemented for controller")
+
+    def plot_value_function(self, num_episode, heatmap=False):
         raise NotImplementedError("plot_value_function not implemented for controller")
\ No newline at end of file
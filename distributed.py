@@ -0,0 +1,443 @@
+import argparse
+import multiprocessing as mp
+import socket
+import struct
+import threading
+import numpy as np
+from constants import *
+from easy_21 import Easy21
+from sarsa import SarsaController
+from lfa import LFAController
+from training import train_td_controller
+from rules import DEFAULT_RULES, RULE_VARIANTS
+from seeding import RandomStreams
+
+# Message types of the sweep protocol. Every message is a frame made of a header (message type, payload length)
+# followed by the payload.
+MSG_HELLO = 0
+MSG_REFERENCE = 1
+MSG_JOB = 2
+MSG_HEARTBEAT = 3
+MSG_RESULT = 4
+MSG_SHUTDOWN = 5
+MSG_ERROR = 6
+
+FRAME_HEADER = struct.Struct('!BI')
+# job_id, controller, lambda, seed, episodes, mse_interval, common random numbers, followed by the utf-8 name of
+# the rule variant.
+JOB_FORMAT = struct.Struct('!IBdIIIB')
+# job_id, number of parameters, number of mean squared errors
+RESULT_HEADER = struct.Struct('!III')
+# job_id, followed by the utf-8 description of the error the job raised.
+ERROR_HEADER = struct.Struct('!I')
+
+CONTROLLERS = {
+    'sarsa': (0, SarsaController),
+    'lfa': (1, LFAController),
+}
+CONTROLLER_NAMES = {code: name for name, (code, _) in CONTROLLERS.items()}
+
+
+def _send_frame(sock, msg_type, payload=b''):
+    """
+    Sends a single protocol frame over the socket.
+    """
+    sock.sendall(FRAME_HEADER.pack(msg_type, len(payload)) + payload)
+
+
+def _recv_exactly(sock, size):
+    """
+    Reads exactly size bytes from the socket, raises ConnectionError if the peer closes the connection.
+    """
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError('Connection closed by peer')
+        data.extend(chunk)
+    return bytes(data)
+
+
+def _recv_frame(sock):
+    """
+    Reads a single protocol frame from the socket.
+
+    Returns:
+        msg_type (int): The message type of the frame.
+        payload (bytes): The payload of the frame.
+    """
+    msg_type, size = FRAME_HEADER.unpack(_recv_exactly(sock, FRAME_HEADER.size))
+    return msg_type, _recv_exactly(sock, size)
+
+
+class SweepJob(object):
+    """
+    SweepJob describes a single training run of a sweep.
+    """
+    def __init__(self, controller, lmbda, seed, num_episodes, mse_interval=1, rules=DEFAULT_RULES.name,
+                 common_random_numbers=False):
+        """
+        Initializes a sweep job.
+
+        Arguments:
+            controller (str): Name of the controller to train, one of CONTROLLERS.
+            lmbda (float): Lambda parameter of the controller.
+            seed (int): Root seed of the job's random streams.
+            num_episodes (int): Number of episodes to train for.
+            mse_interval (int): Number of episodes between two mean squared error samples.
+            rules (str): Name of the rule variant to play, one of RULE_VARIANTS.
+            common_random_numbers (bool): Whether jobs with the same seed play the same card sequences, whatever
+                their controller and lambda.
+        """
+        if controller not in CONTROLLERS:
+            raise ValueError('Unknown controller {}, expected one of {}'.format(controller, list(CONTROLLERS)))
+        if rules not in RULE_VARIANTS:
+            raise ValueError('Unknown rule variant {}, expected one of {}'.format(rules, list(RULE_VARIANTS)))
+        # the job message carries seed, episodes and mse interval as unsigned 32 bit integers.
+        if not 0 <= seed < 2**32:
+            raise ValueError('Seed must be in [0, 2**32), got {}'.format(seed))
+        if not 1 <= num_episodes < 2**32:
+            raise ValueError('Number of episodes must be in [1, 2**32), got {}'.format(num_episodes))
+        if not 1 <= mse_interval < 2**32:
+            raise ValueError('Mean squared error interval must be in [1, 2**32), got {}'.format(mse_interval))
+        self.controller = controller
+        self.lmbda = lmbda
+        self.seed = seed
+        self.num_episodes = num_episodes
+        self.mse_interval = mse_interval
+        self.rules = rules
+        self.common_random_numbers = common_random_numbers
+
+    def encode(self, job_id):
+        """
+        Returns the binary payload of a job message.
+        """
+        return JOB_FORMAT.pack(job_id, CONTROLLERS[self.controller][0], self.lmbda, self.seed, self.num_episodes,
+                               self.mse_interval, self.common_random_numbers) + self.rules.encode('utf-8')
+
+    @staticmethod
+    def decode(payload):
+        """
+        Returns the job id and the SweepJob encoded in the binary payload of a job message.
+        """
+        job_id, controller, lmbda, seed, num_episodes, mse_interval, crn = JOB_FORMAT.unpack_from(payload)
+        rules = payload[JOB_FORMAT.size:].decode('utf-8')
+        return job_id, SweepJob(CONTROLLER_NAMES[controller], lmbda, seed, num_episodes, mse_interval, rules,
+                                bool(crn))
+
+
+class SweepResult(object):
+    """
+    SweepResult holds the outcome of a sweep job.
+    """
+    def __init__(self, job, parameters, mean_squared_errors):
+        """
+        Initializes a sweep result.
+
+        Arguments:
+            job (SweepJob): The job that produced the result.
+            parameters (numpy array): The final Q table (sarsa) or weight vector (lfa) of the controller.
+            mean_squared_errors (numpy 1d array): The sampled mean squared errors.
+        """
+        self.job = job
+        self.parameters = parameters
+        self.mean_squared_errors = mean_squared_errors
+
+    @staticmethod
+    def encode(job_id, parameters, mean_squared_errors):
+        """
+        Returns the binary payload of a result message.
+        """
+        parameters = np.ascontiguousarray(parameters, dtype='>f8')
+        mean_squared_errors = np.ascontiguousarray(mean_squared_errors, dtype='>f8')
+        return (RESULT_HEADER.pack(job_id, parameters.size, mean_squared_errors.size)
+                + parameters.tobytes() + mean_squared_errors.tobytes())
+
+    @staticmethod
+    def decode(payload):
+        """
+        Returns the job id, parameters and mean squared errors encoded in the binary payload of a result message.
+        """
+        job_id, num_parameters, num_errors = RESULT_HEADER.unpack_from(payload)
+        values = np.frombuffer(payload, dtype='>f8', offset=RESULT_HEADER.size).astype(np.float64)
+        if values.size != num_parameters + num_errors:
+            raise ValueError('Malformed result payload for job {}'.format(job_id))
+        return job_id, values[:num_parameters], values[num_parameters:]
+
+
+def run_job(job, optimal_state_action_value=None):
+    """
+    Trains a controller as described by the job.
+
+    Arguments:
+        job (SweepJob): The job to run.
+        optimal_state_action_value (numpy array): Values used to compute the mean squared errors, reshaped to the
+            state action layout of the job's rules.
+
+    Returns:
+        parameters (numpy array): The final Q table (sarsa) or weight vector (lfa) of the controller.
+        mean_squared_errors (list of float): The sampled mean squared errors.
+    """
+    streams = RandomStreams(job.seed, job.common_random_numbers)
+    rules = RULE_VARIANTS[job.rules]
+    if optimal_state_action_value is not None:
+        optimal_state_action_value = optimal_state_action_value.reshape(rules.state_actions)
+    controller = CONTROLLERS[job.controller][1](lmbda=job.lmbda, rules=rules,
+                                                rng=streams.controller(job.controller, job.lmbda))
+    env = Easy21(rules, streams.environment(job.controller, job.lmbda))
+    errors = train_td_controller(env, controller, job.num_episodes, optimal_state_action_value,
+                                 job.mse_interval)
+    if isinstance(controller, LFAController):
+        return controller.weight, errors
+    return controller.state_action_value, errors
+
+
+def run_worker(host, port, heartbeat_interval=HEARTBEAT_INTERVAL):
+    """
+    Connects to a sweep coordinator and runs the jobs it hands out till it asks the worker to shut down. While a
+    job is running a heartbeat is sent every heartbeat_interval seconds.
+
+    Arguments:
+        host (str): Host of the coordinator.
+        port (int): Port of the coordinator.
+        heartbeat_interval (float): Seconds between two heartbeats.
+    """
+    with socket.create_connection((host, port)) as sock:
+        send_lock = threading.Lock()
+        _send_frame(sock, MSG_HELLO)
+
+        msg_type, payload = _recv_frame(sock)
+        if msg_type != MSG_REFERENCE:
+            raise ConnectionError('Expected reference message, got message type {}'.format(msg_type))
+        optimal_state_action_value = None
+        if payload:
+            optimal_state_action_value = np.frombuffer(payload, dtype='>f8').astype(np.float64)
+
+        while True:
+            msg_type, payload = _recv_frame(sock)
+            if msg_type == MSG_SHUTDOWN:
+                return
+            if msg_type != MSG_JOB:
+                raise ConnectionError('Expected job message, got message type {}'.format(msg_type))
+            job_id = JOB_FORMAT.unpack_from(payload)[0]
+
+            # keep the coordinator informed that the worker is alive while the job is running.
+            done = threading.Event()
+            def send_heartbeats():
+                while not done.wait(heartbeat_interval):
+                    with send_lock:
+                        _send_frame(sock, MSG_HEARTBEAT)
+            heartbeat = threading.Thread(target=send_heartbeats, daemon=True)
+            heartbeat.start()
+            try:
+                _, job = SweepJob.decode(payload)
+                parameters, errors = run_job(job, optimal_state_action_value)
+            except Exception as e:
+                # report the failure instead of dying, another worker would only fail the same way.
+                with send_lock:
+                    _send_frame(sock, MSG_ERROR, ERROR_HEADER.pack(job_id) + repr(e).encode('utf-8'))
+                continue
+            finally:
+                done.set()
+                heartbeat.join()
+            with send_lock:
+                _send_frame(sock, MSG_RESULT, SweepResult.encode(job_id, parameters, errors))
+
+
+class SweepCoordinator(object):
+    """
+    SweepCoordinator hands out sweep jobs to workers connecting over TCP and collects their results. A worker that
+    stays silent for longer than heartbeat_timeout is considered lost and its job is handed to another worker.
+    Results are deduplicated by job, so a job that ends up running twice is only recorded once. A job that raises
+    an error on its worker is marked failed right away and its error is kept in errors.
+    """
+    def __init__(self, jobs, host='localhost', port=0, optimal_state_action_value=None,
+                 heartbeat_timeout=HEARTBEAT_TIMEOUT, max_retries=MAX_JOB_RETRIES):
+        """
+        Initializes a coordinator and starts listening for workers.
+
+        Arguments:
+            jobs (list of SweepJob): The jobs of the sweep.
+            host (str): Host to listen on.
+            port (int): Port to listen on, 0 picks a free port.
+            optimal_state_action_value (numpy 3d array): Values the workers compute mean squared errors against,
+                every job must use rules with the same state action layout.
+            heartbeat_timeout (float): Seconds of silence after which a worker is considered lost.
+            max_retries (int): Number of times a job is handed out again after its worker was lost.
+        """
+        self.jobs = list(jobs)
+        if optimal_state_action_value is not None:
+            for job in self.jobs:
+                if optimal_state_action_value.shape != RULE_VARIANTS[job.rules].state_actions:
+                    raise ValueError('Optimal state action values of shape {} do not match the rules {}'.format(
+                        optimal_state_action_value.shape, job.rules))
+        self.optimal_state_action_value = optimal_state_action_value
+        self.heartbeat_timeout = heartbeat_timeout
+        self.max_retries = max_retries
+
+        self.results = {}
+        self.failed = set()
+        self.errors = {}
+        self._pending = list(range(len(self.jobs)))
+        self._attempts = [0]*len(self.jobs)
+        self._condition = threading.Condition()
+
+        self._server = socket.create_server((host, port))
+        self.address = self._server.getsockname()[:2]
+
+    def run(self):
+        """
+        Runs the sweep till every job has a result or has run out of retries.
+
+        Returns:
+            results (dict): Maps each job index to its SweepResult.
+        """
+        accept = threading.Thread(target=self._accept_workers, daemon=True)
+        accept.start()
+        with self._condition:
+            while len(self.results) + len(self.failed) < len(self.jobs):
+                self._condition.wait()
+        self._server.close()
+        return self.results
+
+    def _accept_workers(self):
+        """
+        Accepts worker connections and serves each one on its own thread.
+        """
+        while True:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                # the server socket is closed once the sweep is done.
+                return
+            threading.Thread(target=self._serve_worker, args=(sock,), daemon=True).start()
+
+    def _next_job(self):
+        """
+        Blocks till a job is pending and returns its index, or returns None once the sweep is done.
+        """
+        with self._condition:
+            while True:
+                if self._pending:
+                    job_id = self._pending.pop(0)
+                    self._attempts[job_id] += 1
+                    return job_id
+                if len(self.results) + len(self.failed) == len(self.jobs):
+                    return None
+                # jobs may still come back from lost workers.
+                self._condition.wait()
+
+    def _requeue(self, job_id):
+        """
+        Hands the job to another worker, unless it is done or has run out of retries.
+        """
+        with self._condition:
+            if job_id in self.results:
+                return
+            if self._attempts[job_id] > self.max_retries:
+                self.failed.add(job_id)
+            else:
+                self._pending.append(job_id)
+            self._condition.notify_all()
+
+    def _serve_worker(self, sock):
+        """
+        Runs the protocol with a single worker till the sweep is done or the worker is lost.
+        """
+        job_id = None
+        try:
+            sock.settimeout(self.heartbeat_timeout)
+            msg_type, _ = _recv_frame(sock)
+            if msg_type != MSG_HELLO:
+                return
+            reference = b''
+            if self.optimal_state_action_value is not None:
+                reference = np.ascontiguousarray(self.optimal_state_action_value, dtype='>f8').tobytes()
+            _send_frame(sock, MSG_REFERENCE, reference)
+
+            while True:
+                job_id = self._next_job()
+                if job_id is None:
+                    _send_frame(sock, MSG_SHUTDOWN)
+                    return
+                _send_frame(sock, MSG_JOB, self.jobs[job_id].encode(job_id))
+
+                # wait for the result, every message (including heartbeats) resets the timeout. Late duplicates
+                # of earlier results are recorded (and ignored) without releasing the current job.
+                while True:
+                    msg_type, payload = _recv_frame(sock)
+                    if msg_type == MSG_ERROR:
+                        error_id, = ERROR_HEADER.unpack_from(payload)
+                        self._record_error(error_id, payload[ERROR_HEADER.size:].decode('utf-8'))
+                        if error_id == job_id:
+                            break
+                    if msg_type == MSG_RESULT:
+                        result_id, parameters, mean_squared_errors = SweepResult.decode(payload)
+                        self._record_result(result_id, parameters, mean_squared_errors)
+                        if result_id == job_id:
+                            break
+                job_id = None
+        except (OSError, ConnectionError, struct.error, ValueError):
+            # the worker is lost (socket.timeout is an OSError), give its job to another worker.
+            if job_id is not None:
+                self._requeue(job_id)
+        finally:
+            sock.close()
+
+    def _record_result(self, job_id, parameters, mean_squared_errors):
+        """
+        Records the result of a job, ignoring duplicates.
+        """
+        with self._condition:
+            if job_id in self.results or job_id >= len(self.jobs):
+                return
+            job = self.jobs[job_id]
+            rules = RULE_VARIANTS[job.rules]
+            if job.controller == 'lfa':
+                parameters = parameters.reshape(rules.feature_dim)
+            else:
+                parameters = parameters.reshape(rules.state_actions)
+            self.results[job_id] = SweepResult(job, parameters, mean_squared_errors)
+            self.failed.discard(job_id)
+            self._condition.notify_all()
+
+    def _record_error(self, job_id, error):
+        """
+        Marks a job that raised an error on its worker as failed, unless it already has a result.
+        """
+        with self._condition:
+            if job_id in self.results or job_id >= len(self.jobs):
+                return
+            self.errors[job_id] = error
+            self.failed.add(job_id)
+            if job_id in self._pending:
+                self._pending.remove(job_id)
+            self._condition.notify_all()
+
+
+def run_local_sweep(jobs, num_workers=NUM_SWEEP_WORKERS, optimal_state_action_value=None):
+    """
+    Runs a sweep with a coordinator on localhost and the provided number of local worker processes.
+
+    Returns:
+        results (dict): Maps each job index to its SweepResult.
+    """
+    coordinator = SweepCoordinator(jobs, optimal_state_action_value=optimal_state_action_value)
+    host, port = coordinator.address
+    workers = [mp.Process(target=run_worker, args=(host, port), daemon=True) for _ in range(num_workers)]
+    for worker in workers:
+        worker.start()
+    results = coordinator.run()
+    for worker in workers:
+        worker.join()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run an Easy21 sweep worker.')
+    parser.add_argument('--host', default='localhost', help='Host of the sweep coordinator.')
+    parser.add_argument('--port', type=int, required=True, help='Port of the sweep coordinator.')
+    parser.add_argument('--heartbeat-interval', type=float, default=HEARTBEAT_INTERVAL,
+                        help='Seconds between two heartbeats.')
+    args = parser.parse_args()
+    run_worker(args.host, args.port, args.heartbeat_interval)
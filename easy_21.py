@@ -1,19 +1,53 @@
 from actions import Action
-from card import Card
+from card import Card, draw_card_values
 from state import State
 from colors import Color
 from constants import *
+from rules import DEFAULT_RULES
+import numpy as np
+import seeding
 
 class Easy21(object):
     """
     Easy21 represents the environment for playing the Easy21 Game.
     """
+    def __init__(self, rules=DEFAULT_RULES, seed=None):
+        """
+        Initialize the Easy21 environment.
+
+        Arguments:
+            rules (Easy21Rules): Rules of the game.
+            seed (int or np.random.SeedSequence): Seed of the environment. Environments with the same seed deal the
+                same cards. If not provided the seed is drawn from the shared default generator.
+        """
+        self.rules = rules
+        if seed is None:
+            seed = int(seeding.default_rng().integers(2**63))
+        if isinstance(seed, np.random.SeedSequence):
+            # copy the seed sequence, spawning games from a shared one would shift the cards of the others.
+            seed = np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key)
+        else:
+            seed = np.random.SeedSequence(seed)
+        self.seed_sequence = seed
+        self._new_game_streams()
+
+    def _new_game_streams(self):
+        """
+        Starts fresh card streams for the next game. Every game gets its own streams derived from the seed, and
+        the player's and the dealer's cards come from separate streams. Two environments with the same seed
+        therefore deal the same dealer cards in the n-th game, however many cards the player draws.
+        """
+        player_seed, dealer_seed = self.seed_sequence.spawn(1)[0].spawn(2)
+        self._player_rng = np.random.default_rng(player_seed)
+        self._dealer_rng = np.random.default_rng(dealer_seed)
+
     def initialize_game(self):
         """
         Initiate a new Easy21 Game.
         """
-        dealer_card = Card(color=Color.BLACK)
-        player_card = Card(color=Color.BLACK)
+        self._new_game_streams()
+        dealer_card = Card(color=Color.BLACK, rules=self.rules, rng=self._dealer_rng)
+        player_card = Card(color=Color.BLACK, rules=self.rules, rng=self._player_rng)
         return State(dealer_card, player_card.get_abs_num_value(), False)
 
     def step(self, state, action):
@@ -46,13 +80,13 @@ class Easy21(object):
             next_state (State): The next state to which the game transition.
         """
         # get next card for the player.
-        card = Card()
+        card = Card(rules=self.rules, rng=self._player_rng)
 
         # compute player card sum.
         new_player_card_sum = state.player_card_sum + card.get_num_value()
 
         # check wheter the next state is terminal
-        if new_player_card_sum > MAX_PLAYER_CARD_SUM or new_player_card_sum < MIN_PLAYER_CARD_SUM:
+        if new_player_card_sum > self.rules.max_card_sum or new_player_card_sum < self.rules.min_card_sum:
             return State(state.dealer_card, new_player_card_sum, True), -1
         
         return State(state.dealer_card, new_player_card_sum, False), 0
@@ -69,14 +103,14 @@ class Easy21(object):
         """
         dealer_card_sum = state.dealer_card.get_num_value()
 
-        # dealer keeps hitting till it's card sum is less than 17.
-        while dealer_card_sum > MIN_DEALER_CARD_SUM and dealer_card_sum < MAX_DEALER_CARD_SUM:
+        # dealer keeps hitting while it's card sum is less than the dealer threshold.
+        while dealer_card_sum > self.rules.dealer_min_sum and dealer_card_sum < self.rules.dealer_threshold:
             # sample a new card for the dealer
-            card = Card()
+            card = Card(rules=self.rules, rng=self._dealer_rng)
             dealer_card_sum += card.get_num_value()
         
         next_state = State(state.dealer_card, state.player_card_sum, True)
-        if dealer_card_sum > MAX_PLAYER_CARD_SUM or dealer_card_sum < MIN_PLAYER_CARD_SUM:
+        if dealer_card_sum > self.rules.max_card_sum or dealer_card_sum < self.rules.min_card_sum:
             return next_state, 1
         elif dealer_card_sum > state.player_card_sum:
             return next_state, -1
@@ -84,3 +118,124 @@ class Easy21(object):
             return next_state, 1
         else:
             return next_state, 0
+
+    def play_policy_batch(self, policy, num_games, visits=False):
+        """
+        Plays a batch of Easy21 games in parallel following the provided deterministic policy. The games
+        follow the same rules as initialize_game and step but are simulated with vectorized operations.
+
+        The n-th card of a hand in game g only depends on (g, n), never on what the other games do. Two
+        policies played from environments with the same seed therefore have identical outcomes in the games
+        where they pick the same actions.
+
+        Arguments:
+            policy (numpy 2d array): Action lookup table of shape rules.states, indexed by
+                [dealer_card_value][player_card_sum].
+            num_games (int): Number of games to play.
+            visits (bool): Whether to also return the states each game went through.
+
+        Returns:
+            rewards (numpy 1d array): The final reward of each game: 1 for a win, 0 for a draw and -1 for a loss.
+            visited (numpy 3d array): Only if visits is set, boolean array of shape (num_games,) + rules.states
+                marking the non-terminal states each game went through.
+        """
+        self._new_game_streams()
+        dealer_card = draw_card_values(num_games, color=Color.BLACK, rules=self.rules, rng=self._dealer_rng)
+        player_card_sum = draw_card_values(num_games, color=Color.BLACK, rules=self.rules, rng=self._player_rng)
+        player_cards = _BatchCards(num_games, self.rules, self._player_rng)
+        dealer_cards = _BatchCards(num_games, self.rules, self._dealer_rng)
+        rewards = np.zeros(num_games, dtype=np.int64)
+        active = np.ones(num_games, dtype=bool)
+        visited = np.zeros((num_games,) + self.rules.states, dtype=bool) if visits else None
+
+        while np.any(active):
+            games = np.flatnonzero(active)
+            actions = policy[dealer_card[games], player_card_sum[games]]
+            if visits:
+                visited[games, dealer_card[games], player_card_sum[games]] = True
+
+            # player draws a card in the games where the policy hits, going bust ends the game.
+            hit = games[actions == Action.HIT]
+            player_card_sum[hit] += player_cards.draw(hit)
+            bust = hit[(player_card_sum[hit] > self.rules.max_card_sum) |
+                       (player_card_sum[hit] < self.rules.min_card_sum)]
+            rewards[bust] = -1
+            active[bust] = False
+
+            # dealer plays out the games where the policy sticks.
+            stick = games[actions == Action.STICK]
+            rewards[stick] = self._execute_stick_action_batch(stick, dealer_card[stick], player_card_sum[stick],
+                                                              dealer_cards)
+            active[stick] = False
+
+        if visits:
+            return rewards, visited
+        return rewards
+
+    def _execute_stick_action_batch(self, games, dealer_card, player_card_sum, dealer_cards):
+        """
+        Executes the stick action for a batch of games.
+
+        Arguments:
+            games (numpy 1d array): Index of each game in the batch.
+            dealer_card (numpy 1d array): Value of the dealer's first card in each game.
+            player_card_sum (numpy 1d array): Player card sum in each game.
+            dealer_cards (_BatchCards): Cards of the dealer of every game in the batch.
+
+        Returns:
+            rewards (numpy 1d array): The reward of each game.
+        """
+        dealer_card_sum = dealer_card.copy()
+
+        # dealer keeps hitting while it's card sum is less than the dealer threshold.
+        hitting = (dealer_card_sum > self.rules.dealer_min_sum) & (dealer_card_sum < self.rules.dealer_threshold)
+        while np.any(hitting):
+            dealer_card_sum[hitting] += dealer_cards.draw(games[hitting])
+            hitting = (dealer_card_sum > self.rules.dealer_min_sum) & (dealer_card_sum < self.rules.dealer_threshold)
+
+        dealer_bust = (dealer_card_sum > self.rules.max_card_sum) | (dealer_card_sum < self.rules.min_card_sum)
+        return np.where(dealer_bust, 1, np.sign(player_card_sum - dealer_card_sum))
+
+
+class _BatchCards(object):
+    """
+    _BatchCards holds the cards one hand draws in every game of a batch. Cards are drawn ahead from the hand's
+    stream in blocks of num_draws cards per game, so the n-th card of game g doesn't depend on the other games.
+    """
+    def __init__(self, num_games, rules, rng, num_draws=BATCH_CARD_DRAWS):
+        """
+        Initializes the cards of a batch of games.
+
+        Arguments:
+            num_games (int): Number of games in the batch.
+            rules (Easy21Rules): Rules defining the card deck.
+            rng (np.random.Generator): Stream the cards are drawn from.
+            num_draws (int): Number of cards drawn ahead for each game at a time.
+        """
+        self.num_games = num_games
+        self.rules = rules
+        self.rng = rng
+        self.num_draws = num_draws
+        self.cards = self._draw_block()
+        self.num_drawn = np.zeros(num_games, dtype=np.int64)
+
+    def _draw_block(self):
+        """
+        Draws the next block of cards, one row per game.
+        """
+        values = draw_card_values(self.num_games*self.num_draws, rules=self.rules, rng=self.rng)
+        return values.reshape(self.num_games, self.num_draws)
+
+    def draw(self, games):
+        """
+        Returns the next card of each of the provided games.
+
+        Arguments:
+            games (numpy 1d array): Index of the games drawing a card, each at most once.
+        """
+        draws = self.num_drawn[games]
+        # blocks are always drawn in the same order, so growing doesn't change the cards already dealt.
+        while games.size > 0 and np.max(draws) >= self.cards.shape[1]:
+            self.cards = np.concatenate((self.cards, self._draw_block()), axis=1)
+        self.num_drawn[games] += 1
+        return self.cards[games, draws]
@@ -0,0 +1,155 @@
+from statistics import NormalDist
+import numpy as np
+from constants import *
+from easy_21 import Easy21
+from rules import DEFAULT_RULES
+
+class PolicyEvaluation(object):
+    """
+    PolicyEvaluation holds the outcome of evaluating a policy by playing it against the Easy21 environment.
+    """
+    def __init__(self, num_games, wins, draws, losses, return_variance, confidence):
+        """
+        Initializes a new policy evaluation result.
+
+        Arguments:
+            num_games (int): Number of games played.
+            wins (int): Number of games won by the player.
+            draws (int): Number of games drawn.
+            losses (int): Number of games lost by the player.
+            return_variance (float): Sample variance of the game returns.
+            confidence (float): Confidence level of the reported confidence interval.
+        """
+        self.num_games = num_games
+        self.wins = wins
+        self.draws = draws
+        self.losses = losses
+        self.return_variance = return_variance
+        self.confidence = confidence
+
+    @property
+    def win_rate(self):
+        """
+        Returns the fraction of games won by the player.
+        """
+        return self.wins/self.num_games
+
+    @property
+    def draw_rate(self):
+        """
+        Returns the fraction of games drawn.
+        """
+        return self.draws/self.num_games
+
+    @property
+    def loss_rate(self):
+        """
+        Returns the fraction of games lost by the player.
+        """
+        return self.losses/self.num_games
+
+    @property
+    def expected_return(self):
+        """
+        Returns the mean reward per game.
+        """
+        return (self.wins - self.losses)/self.num_games
+
+    @property
+    def half_width(self):
+        """
+        Returns the half width of the confidence interval of the expected return.
+        """
+        z = NormalDist().inv_cdf((1 + self.confidence)/2)
+        return z*np.sqrt(self.return_variance/self.num_games)
+
+    @property
+    def confidence_interval(self):
+        """
+        Returns the confidence interval of the expected return as a (low, high) tuple.
+        """
+        return (self.expected_return - self.half_width, self.expected_return + self.half_width)
+
+    def __str__(self):
+        return (f'{self.num_games:,} games: win {self.win_rate:.4f}, draw {self.draw_rate:.4f}, '
+                f'loss {self.loss_rate:.4f}, expected return {self.expected_return:.4f} '
+                f'± {self.half_width:.4f} ({self.confidence:.0%} CI)')
+
+
+class PolicyEvaluator(object):
+    """
+    PolicyEvaluator measures how well a greedy policy plays Easy21. Games are simulated in vectorized
+    batches until the confidence interval of the expected return is narrower than the requested target.
+    """
+    def __init__(self, target_half_width=EVAL_TARGET_HALF_WIDTH, confidence=EVAL_CONFIDENCE,
+                 batch_size=EVAL_BATCH_SIZE, min_games=EVAL_MIN_GAMES, max_games=EVAL_MAX_GAMES,
+                 rules=DEFAULT_RULES, seed=None):
+        """
+        Initialize a policy evaluator.
+
+        Arguments:
+            target_half_width (float): Evaluation stops once the confidence interval half width of the expected
+                return is at most this value.
+            confidence (float): Confidence level of the confidence interval.
+            batch_size (int): Number of games simulated per batch.
+            min_games (int): Minimum number of games to play before checking the stopping rule.
+            max_games (int): Maximum number of games to play, even if the target precision is not reached.
+            rules (Easy21Rules): Rules of the games played.
+            seed (int or np.random.SeedSequence): If provided, every evaluation plays the same games from this seed,
+                so policies are compared on common random numbers.
+        """
+        self.rules = rules
+        self.seed = seed
+        self.env = Easy21(rules)
+        self.target_half_width = target_half_width
+        self.confidence = confidence
+        self.batch_size = batch_size
+        self.min_games = min_games
+        self.max_games = max_games
+
+    def evaluate_controller(self, controller):
+        """
+        Evaluates the greedy policy of the provided controller.
+
+        Arguments:
+            controller: Any Easy21 controller implementing get_greedy_policy.
+
+        Returns:
+            evaluation (PolicyEvaluation): The result of the evaluation.
+        """
+        return self.evaluate(controller.get_greedy_policy())
+
+    def evaluate(self, policy):
+        """
+        Evaluates the provided policy by playing batches of games till the stopping rule is met.
+
+        Arguments:
+            policy (numpy 2d array): Action lookup table of shape rules.states, indexed by
+                [dealer_card_value][player_card_sum].
+
+        Returns:
+            evaluation (PolicyEvaluation): The result of the evaluation.
+        """
+        policy = np.asarray(policy, dtype=np.int64)
+        if policy.shape != self.rules.states:
+            raise ValueError('Policy table must have shape {}, got {}'.format(self.rules.states, policy.shape))
+
+        env = self.env if self.seed is None else Easy21(self.rules, self.seed)
+        num_games, wins, draws, losses = 0, 0, 0, 0
+        while True:
+            num_batch_games = min(self.batch_size, self.max_games - num_games)
+            rewards = env.play_policy_batch(policy, num_batch_games)
+            num_games += num_batch_games
+            wins += np.count_nonzero(rewards == 1)
+            draws += np.count_nonzero(rewards == 0)
+            losses += np.count_nonzero(rewards == -1)
+
+            # rewards are in {-1, 0, 1}, so the sample variance follows from the outcome counts.
+            mean = (wins - losses)/num_games
+            variance = (wins + losses - num_games*mean**2)/max(num_games - 1, 1)
+            evaluation = PolicyEvaluation(num_games, wins, draws, losses, variance, self.confidence)
+
+            if num_games >= self.max_games:
+                return evaluation
+            if num_games >= self.min_games and evaluation.half_width <= self.target_half_width:
+                return evaluation
@@ -0,0 +1,222 @@
+import argparse
+import asyncio
+import json
+import os
+import numpy as np
+from constants import *
+
+POLICY_METADATA_FILE = 'policy.json'
+POLICY_ARRAY_FILES = ('actions.npy', 'state_values.npy', 'state_action_values.npy')
+
+class CompiledPolicy(object):
+    """
+    CompiledPolicy is the frozen greedy policy of a trained controller. It holds the greedy action, the state
+    value and the state action values of every non-terminal state as read-only contiguous arrays indexed by
+    [dealer_card_value - min_card_value][player_card_sum - min_card_sum].
+    """
+    def __init__(self, actions, state_values, state_action_values, min_card_value, min_card_sum, rules_name):
+        """
+        Initializes a compiled policy from its arrays.
+
+        Arguments:
+            actions (numpy 2d array): Greedy action of every state.
+            state_values (numpy 2d array): Value of the greedy action of every state.
+            state_action_values (numpy 3d array): Value of every action of every state.
+            min_card_value (int): Dealer card value of the first row of the arrays.
+            min_card_sum (int): Player card sum of the first column of the arrays.
+            rules_name (str): Name of the rules the controller was trained with.
+        """
+        self.actions = actions
+        self.state_values = state_values
+        self.state_action_values = state_action_values
+        self.min_card_value = min_card_value
+        self.min_card_sum = min_card_sum
+        self.rules_name = rules_name
+        self.num_dealer_values, self.num_player_sums = actions.shape
+
+        # flat views used to serve a batch with a single gather per array.
+        self._flat_actions = actions.reshape(-1)
+        self._flat_state_values = state_values.reshape(-1)
+
+    def contains(self, dealer_card_value, player_card_sum):
+        """
+        Returns whether the provided state is covered by the compiled policy.
+        """
+        return (0 <= dealer_card_value - self.min_card_value < self.num_dealer_values and
+                0 <= player_card_sum - self.min_card_sum < self.num_player_sums)
+
+    def save(self, path):
+        """
+        Saves the compiled policy to the provided directory, one .npy file per array.
+        """
+        os.makedirs(path, exist_ok=True)
+        for name, array in zip(POLICY_ARRAY_FILES, (self.actions, self.state_values, self.state_action_values)):
+            np.save(os.path.join(path, name), array)
+        metadata = {'min_card_value': self.min_card_value, 'min_card_sum': self.min_card_sum,
+                    'rules': self.rules_name}
+        with open(os.path.join(path, POLICY_METADATA_FILE), 'w') as f:
+            json.dump(metadata, f)
+
+    @staticmethod
+    def load(path, mmap=True):
+        """
+        Loads a compiled policy saved with save.
+
+        Arguments:
+            path (str): Directory the policy was saved to.
+            mmap (bool): Whether to memory-map the arrays instead of reading them into memory.
+
+        Returns:
+            policy (CompiledPolicy): The loaded policy.
+        """
+        with open(os.path.join(path, POLICY_METADATA_FILE)) as f:
+            metadata = json.load(f)
+        arrays = [np.load(os.path.join(path, name), mmap_mode='r' if mmap else None) for name in POLICY_ARRAY_FILES]
+        if not mmap:
+            for array in arrays:
+                array.flags.writeable = False
+        return CompiledPolicy(*arrays, metadata['min_card_value'], metadata['min_card_sum'], metadata['rules'])
+
+
+def compile_policy(controller):
+    """
+    Compiles the greedy policy of a trained controller into a CompiledPolicy.
+
+    Arguments:
+        controller: Any Easy21 controller implementing get_state_action_values.
+
+    Returns:
+        policy (CompiledPolicy): The compiled policy.
+    """
+    rules = controller.rules
+    state_action_values = controller.get_state_action_values()[rules.min_card_value:, rules.min_card_sum:]
+    # ties are broken in favour of Action.HIT, as in get_greedy_policy.
+    actions = np.ascontiguousarray(np.argmax(state_action_values, axis=2), dtype=np.uint8)
+    state_values = np.ascontiguousarray(np.max(state_action_values, axis=2), dtype=np.float32)
+    state_action_values = np.ascontiguousarray(state_action_values, dtype=np.float32)
+    for array in (actions, state_values, state_action_values):
+        array.flags.writeable = False
+    return CompiledPolicy(actions, state_values, state_action_values, rules.min_card_value, rules.min_card_sum,
+                          rules.name)
+
+
+def batch_infer(policy, dealer_card_value, player_card_sum):
+    """
+    Returns the greedy actions and state values of a batch of states. The call has no side effects.
+
+    Arguments:
+        policy (CompiledPolicy): The compiled policy.
+        dealer_card_value (numpy 1d array): Dealer card value of every state.
+        player_card_sum (numpy 1d array): Player card sum of every state.
+
+    Returns:
+        actions (numpy 1d array): The greedy action of every state.
+        state_values (numpy 1d array): The value of the greedy action of every state.
+    """
+    i = np.asarray(dealer_card_value, dtype=np.int64) - policy.min_card_value
+    j = np.asarray(player_card_sum, dtype=np.int64) - policy.min_card_sum
+    if np.any((i < 0) | (i >= policy.num_dealer_values) | (j < 0) | (j >= policy.num_player_sums)):
+        raise ValueError('States out of range of the compiled policy')
+    index = i*policy.num_player_sums + j
+    return policy._flat_actions[index], policy._flat_state_values[index]
+
+
+class PolicyServer(object):
+    """
+    PolicyServer serves a compiled policy over a local asyncio TCP server. Each request is a line
+    "<dealer_card_value> <player_card_sum>" answered with a line "<action> <state_value>". Requests arriving
+    together are coalesced into a single batch_infer call.
+    """
+    def __init__(self, policy, max_batch_size=INFERENCE_MAX_BATCH_SIZE, max_delay=INFERENCE_MAX_DELAY):
+        """
+        Initializes a policy server.
+
+        Arguments:
+            policy (CompiledPolicy): The compiled policy to serve.
+            max_batch_size (int): Largest number of requests served in a single batch.
+            max_delay (float): Seconds the first request of a batch waits for more requests to join it.
+        """
+        self.policy = policy
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.batch_sizes = []
+        self._requests = None
+        self._batcher = None
+
+    async def infer(self, dealer_card_value, player_card_sum):
+        """
+        Returns the greedy action and state value of a single state, batched with concurrent requests.
+        """
+        if self._requests is None:
+            self._requests = asyncio.Queue()
+            self._batcher = asyncio.get_running_loop().create_task(self._serve_batches())
+        # validate here so a bad request fails on its own instead of failing its batch.
+        if not self.policy.contains(dealer_card_value, player_card_sum):
+            raise ValueError('State {} out of range of the compiled policy'.format((dealer_card_value,
+                                                                                    player_card_sum)))
+        future = asyncio.get_running_loop().create_future()
+        await self._requests.put((dealer_card_value, player_card_sum, future))
+        return await future
+
+    async def _serve_batches(self):
+        """
+        Collects pending requests into batches and answers each batch with one batch_infer call.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._requests.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._requests.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            dealer_card_value, player_card_sum, futures = zip(*batch)
+            actions, state_values = batch_infer(self.policy, dealer_card_value, player_card_sum)
+            self.batch_sizes.append(len(batch))
+            for future, action, state_value in zip(futures, actions, state_values):
+                if not future.cancelled():
+                    future.set_result((int(action), float(state_value)))
+
+    async def _handle_client(self, reader, writer):
+        """
+        Answers the requests of a single client connection.
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    dealer_card_value, player_card_sum = (int(x) for x in line.split())
+                    action, state_value = await self.infer(dealer_card_value, player_card_sum)
+                    writer.write(f'{action} {state_value}\n'.encode())
+                except ValueError as e:
+                    writer.write(f'error {e}\n'.encode())
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host=INFERENCE_HOST, port=INFERENCE_PORT):
+        """
+        Starts the TCP server and returns it, call serve_forever on it to keep serving.
+        """
+        return await asyncio.start_server(self._handle_client, host, port)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve a compiled Easy21 policy.')
+    parser.add_argument('policy', help='Directory of the compiled policy.')
+    parser.add_argument('--host', default=INFERENCE_HOST, help='Host to listen on.')
+    parser.add_argument('--port', type=int, default=INFERENCE_PORT, help='Port to listen on.')
+    args = parser.parse_args()
+
+    async def main():
+        server = await PolicyServer(CompiledPolicy.load(args.policy)).serve(args.host, args.port)
+        async with server:
+            await server.serve_forever()
+    asyncio.run(main())
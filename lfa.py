@@ -1,20 +1,28 @@
 from constants import *
+from plotting import get_renderer
 import numpy as np
 from actions import Action
-import matplotlib.pyplot as plt
-import os
+from rules import DEFAULT_RULES
+import seeding
 
 class LFAController(object):
-    def __init__(self, lmbda=0.0):
+    def __init__(self, lmbda=0.0, rules=DEFAULT_RULES, rng=None):
         """
         Initialize a Linear Function Approximation controller for Easy21 Game.
+
+        Arguments:
+            lmbda (float): Lambda parameter to be used for weighting the future returns.
+            rules (Easy21Rules): Rules of the game, the feature brackets are taken from them.
+            rng (np.random.Generator): Generator used for exploration, the shared default generator if not provided.
         """
+        self.rules = rules
+        self.rng = rng if rng is not None else seeding.default_rng()
         # initiate eligibility traces to zero for all features.
-        self.eligibility_trace = np.zeros(FEATURE_DIM)
+        self.eligibility_trace = np.zeros(self.rules.feature_dim)
         # lmbda represents the lambda parameter of the Sarsa controller.
         self.lmbda = lmbda
         # initiate weight vector to all zeros.
-        self.weight = np.zeros(FEATURE_DIM)
+        self.weight = np.zeros(self.rules.feature_dim)
 
         # set step size and epsilon
         self.step_size = 0.01
@@ -29,8 +37,8 @@ class LFAController(object):
         vector representation.
         """
         self.feature_map = {}
-        for d in range(MIN_DEALER_CARD_VALUE, MAX_DEALER_CARD_VALUE + 1):
-            for p in range(MIN_PLAYER_CARD_SUM, MAX_PLAYER_CARD_SUM + 1):
+        for d in range(self.rules.min_card_value, self.rules.max_card_value + 1):
+            for p in range(self.rules.min_card_sum, self.rules.max_card_sum + 1):
                 for a in range(NUM_ACTIONS):
                     self.feature_map[(d, p, a)] = self._compute_feature(d, p, a)
 
@@ -44,15 +52,16 @@ class LFAController(object):
             a (Action): Action taken by the agent in the state.
         
         Returns:
-            feat (np.array(FEATURE_DIM)): A numpy array representing the feature vector for the provided
+            feat (np.array(rules.feature_dim)): A numpy array representing the feature vector for the provided
                 state action. 
         """
-        feat = np.zeros(FEATURE_DIM)
-        idx = lambda x : 12*x[0] + 2*x[1] + x[2]
-        for i, db in enumerate(DEALER_BRACKETS):
+        feat = np.zeros(self.rules.feature_dim)
+        num_player_brackets = len(self.rules.player_brackets)
+        idx = lambda x : NUM_ACTIONS*num_player_brackets*x[0] + NUM_ACTIONS*x[1] + x[2]
+        for i, db in enumerate(self.rules.dealer_brackets):
             if d < db[0] or d > db[1]:
                 continue
-            for j, pb in enumerate(PLAYER_BRACKETS):
+            for j, pb in enumerate(self.rules.player_brackets):
                 if p < pb[0] or p > pb[1]:
                     continue
                 feat[idx((i, j, a))][0] = 1.0
@@ -83,8 +92,8 @@ class LFAController(object):
         value_stick = self.weight.T.dot(feature_stick)
 
         # pick epsilon greedy action.
-        if np.random.random() <= self.epsilon or value_hit == value_stick:
-            return Action(np.random.choice(np.arange(2)))
+        if self.rng.random() <= self.epsilon or value_hit == value_stick:
+            return Action(self.rng.integers(NUM_ACTIONS))
         
         # return action with greater action value.
         return Action.HIT if value_hit > value_stick else Action.STICK
@@ -124,7 +133,7 @@ class LFAController(object):
             action (Action): Action taken by the agent in the state.
         """
         if state.is_terminal():
-            return np.zeros(FEATURE_DIM)
+            return np.zeros(self.rules.feature_dim)
         d, p, a = (state.dealer_card.get_num_value(), state.player_card_sum, int(action))
         if self.feature_map.get((d, p, a)) is None:
             raise ValueError('State-Action {} not present in feature map'.format((d, p, a)))
@@ -134,15 +143,14 @@ class LFAController(object):
         """
         Clears eligibility traces after end of each episode.
         """
-        self.eligibility_trace = np.zeros(FEATURE_DIM)
+        self.eligibility_trace = np.zeros(self.rules.feature_dim)
         
     def compute_mean_squared_error(self, optimal_state_action_value):
         """
         Returns the mean squared error of the state action value w.r.t provided optimal state action values.
         """
-        all_state_actions = MAX_DEALER_CARD_VALUE*MAX_PLAYER_CARD_SUM*NUM_ACTIONS
         state_action_values = self._compute_state_action_values()
-        return np.sum(np.square(optimal_state_action_value - state_action_values))/all_state_actions
+        return np.sum(np.square(optimal_state_action_value - state_action_values))/self.rules.num_state_actions
     
     def _compute_state_action_values(self):
         """
@@ -152,50 +160,50 @@ class LFAController(object):
             state_action_value (numpy 3d array): A numpy 3d array containing state action values for all state
                 and action pairs.
         """
-        state_action_values = np.zeros(STATE_ACTIONS)
-        for d in range(MIN_DEALER_CARD_VALUE, MAX_DEALER_CARD_VALUE + 1):
-            for p in range(MIN_PLAYER_CARD_SUM, MAX_PLAYER_CARD_SUM + 1):
+        state_action_values = np.zeros(self.rules.state_actions)
+        for d in range(self.rules.min_card_value, self.rules.max_card_value + 1):
+            for p in range(self.rules.min_card_sum, self.rules.max_card_sum + 1):
                 for a in range(NUM_ACTIONS):
                     if self.feature_map.get((d, p, a)) is None:
                         raise ValueError('State-Action {} not present in feature map'.format((d, p, a)))
-                    state_action_values[d][p][a] = self.weight.T.dot(self.feature_map[(d, p, a)])
+                    state_action_values[d][p][a] = self.weight.T.dot(self.feature_map[(d, p, a)]).item()
         return state_action_values
     
-    def plot_value_function(self, num_episode):
+    def get_state_action_values(self):
+        """
+        Returns the state action values of the controller as a numpy array of shape rules.state_actions.
+        """
+        return self._compute_state_action_values()
+
+    def get_greedy_policy(self):
+        """
+        Returns the greedy policy of the controller frozen as an action lookup table. Ties between the
+        action values are broken in favour of Action.HIT.
+
+        Returns:
+            policy (numpy 2d array): A numpy array of shape rules.states where policy[dealer_card_value][player_card_sum]
+                is the greedy action for that state.
+        """
+        return np.argmax(self._compute_state_action_values(), axis=2)
+
+    def get_value_function_plot(self, num_episode):
+        """
+        Returns the state action values, title and path of the value function plot for the given episode number.
+
+        Arguments:
+            num_episode (int): The current episode number of the Easy21 game.
+        """
+        return (self._compute_state_action_values(), f'V* [λ = {self.lmbda}, {num_episode} episodes]',
+                f'{LFA_RESULT_PATH}/value_func_λ({self.lmbda})_episode({num_episode}).png')
+
+    def plot_value_function(self, num_episode, heatmap=False):
         """
         Plots the action value function and saves them as .png for the given episode number.
 
         Arguments:
             num_episode (int): The current episode number of the Easy21 game.
+            heatmap (bool): Whether to also save the value function as a heatmap.
         """
         print('')
         print(f'Plotting value function for Sarsa(λ={self.lmbda})')
-
-        state_action_values = self._compute_state_action_values()
-
-        dealer_card_value = np.arange(MIN_DEALER_CARD_VALUE, MAX_DEALER_CARD_VALUE+1)
-        player_card_sum = np.arange(MIN_PLAYER_CARD_SUM, MAX_PLAYER_CARD_SUM+1)
-
-        # create grid of dealer card value and player card sum on X and Y axis respectively.
-        X, Y = np.meshgrid(dealer_card_value, player_card_sum)
-        # initiate z-axis as zeros to plot optimal value function.
-        Z = np.zeros((21, 10))
-        for i in range(21):
-            for j in range(10):
-                idx = X[i][j]
-                idy = Y[i][j]
-                Z[i][j] = np.max(state_action_values[idx][idy])
-        # plot optimal value functions.
-        plt.figure(figsize=FIG_SIZE)
-        ax = plt.axes(projection='3d')
-        ax.plot_surface(X, Y, Z, rstride=1, cstride=1,
-                cmap='viridis', edgecolor='none')
-        ax.set_xlabel('Dealer Showing')
-        ax.set_ylabel('Player Sum')
-        ax.set_zlabel('V*(s)')
-        ax.set_title(f'V* [λ = {self.lmbda}, {num_episode} episodes]')
-        #save figure
-        if os.path.isdir(LFA_RESULT_PATH) is False:
-            os.mkdir(LFA_RESULT_PATH)
-        plt.savefig(f'{LFA_RESULT_PATH}/value_func_λ({self.lmbda})_episode({num_episode}).png')
-        plt.close()
+        get_renderer(self.rules).plot_sweep([self.get_value_function_plot(num_episode)], heatmap)
@@ -2,12 +2,20 @@ from easy_21 import Easy21
 from monte_carlo import MonteCarloController
 from sarsa import SarsaController
 from lfa import LFAController
+from evaluation import PolicyEvaluator
+from model import Easy21Model
+from training import train_td_controller
+from plotting import get_renderer
+from seeding import RandomStreams
 from constants import *
 import matplotlib.pyplot as plt
 
-# set up environment and monte-carlo controller.
-env = Easy21()
-mc_controller = MonteCarloController()
+# set up random streams, environment, policy evaluator and monte-carlo controller.
+streams = RandomStreams(SEED, COMMON_RANDOM_NUMBERS)
+env = Easy21(seed=streams.environment('monte_carlo'))
+evaluator = PolicyEvaluator(seed=streams.seed_sequence_for('evaluation'))
+model = Easy21Model()
+mc_controller = MonteCarloController(rng=streams.controller('monte_carlo'))
 
 print('Playing Easy 21 with Monte-Carlo controller....')
 # play easy 21 using monte-carlo controller.
@@ -36,9 +44,11 @@ for e in range(NUM_MC_EPISODES):
     mc_controller.update_policy(state_actions, episode_reward)
 
     if (e+1) in PLOT_EPISODES:
-        mc_controller.plot_value_function(e+1)
+        mc_controller.plot_value_function(e+1, heatmap=PLOT_HEATMAPS)
 print('')
 print('Monte-Carlo game done')
+print(f'Monte-Carlo greedy policy: {evaluator.evaluate_controller(mc_controller)}')
+print(f'Monte-Carlo greedy policy exact expected return: {model.expected_return(mc_controller.get_greedy_policy()):.4f}')
 print('')
 
 # play easy 21 using sarsa controller.
@@ -46,43 +56,27 @@ print('Playing Easy21 with SARSA controller....')
 
 # mean_squared_error will store the mean squared error of value function after each episode.
 mean_square_errors = {}
+# value_function_plots will store the value function plot of each λ.
+value_function_plots = []
 
 for lmbda in LAMBDA_VALUES:
-    sarsa_controller = SarsaController(lmbda=lmbda)
-    # initialize mean_square_error for lmbda.
-    mean_square_errors[lmbda] = [0 for i in range(NUM_SARSA_EPISODES)]
+    sarsa_controller = SarsaController(lmbda=lmbda, rng=streams.controller('sarsa', lmbda))
+    env = Easy21(seed=streams.environment('sarsa', lmbda))
     print(f'Starting game for λ = {lmbda}')
-    for e in range(1, NUM_SARSA_EPISODES+1):
-        print(f'Episode {e:,}/{NUM_SARSA_EPISODES:,} done.', end='\r')
-
-        # clear eligibility traces.
-        sarsa_controller.clear_eligibility_traces()
-
-        # get initital state and action.
-        prev_state = env.initialize_game()
-        prev_action = sarsa_controller.get_action(prev_state)
-
-        # play game till termination.
-        while prev_state.is_terminal() == False:
-            # execute one step in the environment.
-            curr_state, reward = env.step(prev_state, prev_action)
-            # get action for current state.
-            curr_action = sarsa_controller.get_action(curr_state)
-
-            # update policy based on prev and current state actions.
-            sarsa_controller.update_policy(prev_state, prev_action, curr_state, curr_action, reward)
-
-            # swap prev state-action with current state-action.
-            prev_state, prev_action = curr_state, curr_action
-
-        # compute mean square error of the sarsa value function with optimal (monte-carlo) value function.
-        mean_square_errors[lmbda][e-1] = sarsa_controller.compute_mean_squared_error(mc_controller.state_action_value)
-
-    # plot value function.
-    sarsa_controller.plot_value_function(NUM_SARSA_EPISODES)
+    # train controller and compute mean square error of its value function with optimal (monte-carlo) value
+    # function after each episode.
+    mean_square_errors[lmbda] = train_td_controller(env, sarsa_controller, NUM_SARSA_EPISODES,
+                                                    mc_controller.state_action_value, verbose=True)
+
+    # store value function plot, the whole sweep is plotted at once.
+    value_function_plots.append(sarsa_controller.get_value_function_plot(NUM_SARSA_EPISODES))
+    print(f'Sarsa(λ={lmbda}) greedy policy: {evaluator.evaluate_controller(sarsa_controller)}')
 print('')
 print('SARSA game done')
 print()
+# plot value functions.
+print('Plotting value functions for Sarsa(λ)')
+get_renderer().plot_sweep(value_function_plots, heatmap=PLOT_HEATMAPS)
 # plot mean squared error.
 print('Plotting mean squared error for Sarsa(λ)')
 plt.figure(figsize=FIG_SIZE)
@@ -118,43 +112,27 @@ print('Playing Easy21 with LFA controller....')
 
 # mean_squared_error will store the mean squared error of value function after each episode.
 mean_square_errors = {}
+# value_function_plots will store the value function plot of each λ.
+value_function_plots = []
 
 for lmbda in LAMBDA_VALUES:
-    lfa_controller = LFAController(lmbda=lmbda)
-    # initialize mean_square_error for lmbda.
-    mean_square_errors[lmbda] = [0 for i in range(NUM_LFA_EPISODES)]
+    lfa_controller = LFAController(lmbda=lmbda, rng=streams.controller('lfa', lmbda))
+    env = Easy21(seed=streams.environment('lfa', lmbda))
     print(f'Starting game for λ = {lmbda}')
-    for e in range(1, NUM_LFA_EPISODES+1):
-        print(f'Episode {e:,}/{NUM_LFA_EPISODES:,} done.', end='\r')
-
-        # clear eligibility traces.
-        lfa_controller.clear_eligibility_traces()
-
-        # get initital state and action.
-        prev_state = env.initialize_game()
-        prev_action = lfa_controller.get_action(prev_state)
-
-        # play game till termination.
-        while prev_state.is_terminal() == False:
-            # execute one step in the environment.
-            curr_state, reward = env.step(prev_state, prev_action)
-            # get action for current state.
-            curr_action = lfa_controller.get_action(curr_state)
-
-            # update policy based on prev and current state actions.
-            lfa_controller.update_policy(prev_state, prev_action, curr_state, curr_action, reward)
-
-            # swap prev state-action with current state-action.
-            prev_state, prev_action = curr_state, curr_action
-
-        # compute mean square error of the lfa  value function with optimal (monte-carlo) value function.
-        mean_square_errors[lmbda][e-1] = lfa_controller.compute_mean_squared_error(mc_controller.state_action_value)
-
-    # plot value function.
-    lfa_controller.plot_value_function(NUM_LFA_EPISODES)
+    # train controller and compute mean square error of its value function with optimal (monte-carlo) value
+    # function after each episode.
+    mean_square_errors[lmbda] = train_td_controller(env, lfa_controller, NUM_LFA_EPISODES,
+                                                    mc_controller.state_action_value, verbose=True)
+
+    # store value function plot, the whole sweep is plotted at once.
+    value_function_plots.append(lfa_controller.get_value_function_plot(NUM_LFA_EPISODES))
+    print(f'LFA Sarsa(λ={lmbda}) greedy policy: {evaluator.evaluate_controller(lfa_controller)}')
 print('')
 print('LFA game done')
 print()
+# plot value functions.
+print('Plotting value functions for LFA Sarsa(λ)')
+get_renderer().plot_sweep(value_function_plots, heatmap=PLOT_HEATMAPS)
 # plot mean squared error per episode.
 print('Plotting mean squared error for LFA Sarsa(λ)')
 plt.figure(figsize=FIG_SIZE)
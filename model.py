@@ -0,0 +1,191 @@
+import numpy as np
+import scipy.sparse as sparse
+from scipy.sparse.linalg import spsolve
+from constants import *
+from actions import Action
+from rules import DEFAULT_RULES
+
+class Easy21Model(object):
+    """
+    Easy21Model is the exact model of the Easy21 environment. It holds the transition probabilities P(s'|s,a)
+    and expected rewards R(s,a) over the non-terminal states, derived from the card distribution and the dealer
+    rules instead of being sampled.
+    """
+    def __init__(self, rules=DEFAULT_RULES):
+        """
+        Builds the transition and reward model of the Easy21 Game.
+
+        Arguments:
+            rules (Easy21Rules): Rules of the game.
+        """
+        self.rules = rules
+        self.num_states = rules.num_states
+
+        # card_values holds every signed card value and card_probs the probability of drawing it.
+        self.card_values, self.card_probs = self._compute_card_distribution()
+
+        # dealer_final_distribution[d][k] is the probability that the dealer ends with card sum dealer_final_sums[k]
+        # when it starts with card value d.
+        self.dealer_final_sums, self.dealer_final_distribution = self._compute_dealer_final_distribution()
+
+        # transition[a] is a sparse (num_states, num_states) matrix with transition[a][s, s'] = P(s'|s,a).
+        # Transitions to terminal states are left out, so rows may sum to less than one.
+        # reward[s, a] is the expected reward R(s,a).
+        self.transition = [None]*NUM_ACTIONS
+        self.reward = np.zeros((self.num_states, NUM_ACTIONS))
+        self._init_hit_model()
+        self._init_stick_model()
+
+    def state_index(self, dealer_card_value, player_card_sum):
+        """
+        Returns the row of the provided non-terminal state in the model matrices.
+        """
+        return ((dealer_card_value - self.rules.min_card_value)*self.rules.num_player_sums
+                + (player_card_sum - self.rules.min_card_sum))
+
+    def _compute_card_distribution(self):
+        """
+        Computes the distribution of the signed value of a card drawn with a random color.
+
+        Returns:
+            card_values (numpy 1d array): Every signed card value.
+            card_probs (numpy 1d array): The probability of drawing each card value.
+        """
+        values = np.arange(self.rules.min_card_value, self.rules.max_card_value + 1)
+        card_values = np.concatenate([values, -values])
+        card_probs = np.concatenate([np.full(values.size, self.rules.black_probability/values.size),
+                                     np.full(values.size, self.rules.red_probability/values.size)])
+        return card_values, card_probs
+
+    def _compute_dealer_final_distribution(self):
+        """
+        Computes the distribution of the dealer's final card sum for every dealer first card. The dealer keeps
+        hitting while its card sum is in (dealer_min_sum, dealer_threshold), so the final sum is the absorption
+        point of a random walk over those sums.
+
+        Returns:
+            final_sums (numpy 1d array): Every card sum the dealer can end the game with.
+            final_distribution (numpy 2d array): final_distribution[d][k] is the probability of ending with
+                final_sums[k] when starting with card value d.
+        """
+        rules = self.rules
+        hitting_sums = np.arange(rules.dealer_min_sum + 1, rules.dealer_threshold)
+        lowest = min(rules.dealer_min_sum + 1 - rules.max_card_value, rules.min_card_value)
+        highest = max(rules.dealer_threshold - 1 + rules.max_card_value, rules.max_card_value)
+        all_sums = np.arange(lowest, highest + 1)
+        final_sums = all_sums[(all_sums <= rules.dealer_min_sum) | (all_sums >= rules.dealer_threshold)]
+        hitting_index = np.full(all_sums.size, -1)
+        hitting_index[hitting_sums - lowest] = np.arange(hitting_sums.size)
+        final_index = np.full(all_sums.size, -1)
+        final_index[final_sums - lowest] = np.arange(final_sums.size)
+
+        # one step transitions between hitting sums (Q) and from hitting sums to final sums (B).
+        Q = np.zeros((hitting_sums.size, hitting_sums.size))
+        B = np.zeros((hitting_sums.size, final_sums.size))
+        rows = np.arange(hitting_sums.size)
+        for v, prob in zip(self.card_values, self.card_probs):
+            next_sums = hitting_sums + v - lowest
+            hitting = hitting_index[next_sums] >= 0
+            Q[rows[hitting], hitting_index[next_sums[hitting]]] += prob
+            B[rows[~hitting], final_index[next_sums[~hitting]]] += prob
+
+        # absorption probabilities of the random walk.
+        absorption = np.linalg.solve(np.eye(hitting_sums.size) - Q, B)
+
+        final_distribution = np.zeros((rules.max_card_value + 1, final_sums.size))
+        for d in range(rules.min_card_value, rules.max_card_value + 1):
+            if hitting_index[d - lowest] >= 0:
+                final_distribution[d] = absorption[hitting_index[d - lowest]]
+            else:
+                # the dealer doesn't hit at all.
+                final_distribution[d][final_index[d - lowest]] = 1.0
+        return final_sums, final_distribution
+
+    def _init_hit_model(self):
+        """
+        Builds the transition matrix and expected rewards of the hit action.
+        """
+        # states are ordered by dealer card value first and player card sum second.
+        player_card_sum = np.tile(np.arange(self.rules.min_card_sum, self.rules.max_card_sum + 1),
+                                  self.rules.num_dealer_values)
+        states = np.arange(self.num_states)
+        rows, cols, probs = [], [], []
+        for v, prob in zip(self.card_values, self.card_probs):
+            next_sum = player_card_sum + v
+            # going bust ends the game with reward -1.
+            bust = (next_sum > self.rules.max_card_sum) | (next_sum < self.rules.min_card_sum)
+            self.reward[bust, Action.HIT] -= prob
+            rows.append(states[~bust])
+            cols.append(states[~bust] + v)
+            probs.append(np.full(np.count_nonzero(~bust), prob))
+        self.transition[Action.HIT] = sparse.csr_matrix(
+            (np.concatenate(probs), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(self.num_states, self.num_states))
+
+    def _init_stick_model(self):
+        """
+        Builds the transition matrix and expected rewards of the stick action. Sticking always ends the game.
+        """
+        player_card_sum = np.arange(self.rules.min_card_sum, self.rules.max_card_sum + 1)
+        dealer_bust = ((self.dealer_final_sums > self.rules.max_card_sum) |
+                       (self.dealer_final_sums < self.rules.min_card_sum))
+        # outcome[k][p] is the reward of sticking on player card sum p when the dealer ends with
+        # dealer_final_sums[k].
+        outcome = np.where(dealer_bust[:, np.newaxis], 1,
+                           np.sign(player_card_sum[np.newaxis, :] - self.dealer_final_sums[:, np.newaxis]))
+        distribution = self.dealer_final_distribution[self.rules.min_card_value:]
+        self.reward[:, Action.STICK] = (distribution @ outcome).ravel()
+        self.transition[Action.STICK] = sparse.csr_matrix((self.num_states, self.num_states))
+
+    def evaluate_policy(self, policy):
+        """
+        Computes the exact state and state action values of the provided policy by solving the Bellman
+        equation V = R_π + P_π V as a sparse linear system.
+
+        Arguments:
+            policy (numpy 2d array): Action lookup table of shape rules.states, indexed by
+                [dealer_card_value][player_card_sum].
+
+        Returns:
+            state_value (numpy 2d array): V^π in the rules.states layout.
+            state_action_value (numpy 3d array): Q^π in the rules.state_actions layout.
+        """
+        rules = self.rules
+        policy = np.asarray(policy)
+        if policy.shape != rules.states:
+            raise ValueError('Policy table must have shape {}, got {}'.format(rules.states, policy.shape))
+        actions = policy[rules.min_card_value:, rules.min_card_sum:].reshape(self.num_states)
+
+        # select the transition row and reward of the policy action in every state.
+        P = sparse.csr_matrix((self.num_states, self.num_states))
+        R = np.zeros(self.num_states)
+        for a in range(NUM_ACTIONS):
+            selected = (actions == a).astype(float)
+            P = P + sparse.diags(selected) @ self.transition[a]
+            R += selected*self.reward[:, a]
+
+        V = spsolve((sparse.identity(self.num_states) - P).tocsc(), R)
+        Q = np.column_stack([self.reward[:, a] + self.transition[a] @ V for a in range(NUM_ACTIONS)])
+
+        state_value = np.zeros(rules.states)
+        state_value[rules.min_card_value:, rules.min_card_sum:] = V.reshape(rules.num_dealer_values,
+                                                                            rules.num_player_sums)
+        state_action_value = np.zeros(rules.state_actions)
+        state_action_value[rules.min_card_value:, rules.min_card_sum:] = Q.reshape(
+            rules.num_dealer_values, rules.num_player_sums, NUM_ACTIONS)
+        return state_value, state_action_value
+
+    def evaluate_controller(self, controller):
+        """
+        Computes the exact state and state action values of the greedy policy of the provided controller.
+        """
+        return self.evaluate_policy(controller.get_greedy_policy())
+
+    def expected_return(self, policy):
+        """
+        Returns the exact expected return of the provided policy from the initial state distribution of the
+        game, where the dealer and the player both start with a black card.
+        """
+        state_value, _ = self.evaluate_policy(policy)
+        return np.mean(state_value[self.rules.min_card_value:self.rules.max_card_value + 1,
+                                   self.rules.min_card_value:self.rules.max_card_value + 1])
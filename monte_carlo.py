@@ -1,10 +1,7 @@
 from controller import Easy21Controller
-import numpy as np
 from actions import Action
-from mpl_toolkits import mplot3d
-import matplotlib.pyplot as plt
 from constants import *
-import os
+from plotting import get_renderer
 
 class MonteCarloController(Easy21Controller):
     def update_policy(self, state_actions, total_reward):
@@ -30,39 +27,24 @@ class MonteCarloController(Easy21Controller):
              new_val = curr_val + ((total_reward - curr_val)/count)
              self.state_action_value[dealer_card_value][player_card_sum][action] = new_val
     
-    def plot_value_function(self, num_episode):
+    def get_value_function_plot(self, num_episode):
+        """
+        Returns the state action values, title and path of the value function plot for the given episode number.
+
+        Arguments:
+            num_episode (int): The current episode number of the Easy21 game.
+        """
+        return (self.state_action_value.copy(), f'V* [{num_episode} episodes]',
+                f'{MONTE_CARLO_RESULT_PATH}/value_func_episode({num_episode}).png')
+
+    def plot_value_function(self, num_episode, heatmap=False):
         """
         Plots the value function and saves them as .png for the given episode number.
 
         Arguments:
             num_episode (int): The current episode number of the Easy21 game.
+            heatmap (bool): Whether to also save the value function as a heatmap.
         """
         print('')
         print(f'Plotting monte-carlo result for {num_episode} episodes')
-
-        dealer_card_value = np.arange(MIN_DEALER_CARD_VALUE, MAX_DEALER_CARD_VALUE+1)
-        player_card_sum = np.arange(MIN_PLAYER_CARD_SUM, MAX_PLAYER_CARD_SUM+1)
-
-        # create grid of dealer card value and player card sum on X and Y axis respectively.
-        X, Y = np.meshgrid(dealer_card_value, player_card_sum)
-        # initiate z-axis as zeros to plot optimal value function.
-        Z = np.zeros((21, 10))
-        for i in range(21):
-            for j in range(10):
-                idx = X[i][j]
-                idy = Y[i][j]
-                Z[i][j] = np.max(self.state_action_value[idx][idy])
-        # plot optimal value functions.
-        plt.figure(figsize=FIG_SIZE)
-        ax = plt.axes(projection='3d')
-        ax.plot_surface(X, Y, Z, rstride=1, cstride=1,
-                cmap='viridis', edgecolor='none')
-        ax.set_xlabel('Dealer Showing')
-        ax.set_ylabel('Player Sum')
-        ax.set_zlabel('V*(s)')
-        ax.set_title(f'V* [{num_episode} episodes]')
-        #save figure
-        if os.path.isdir(MONTE_CARLO_RESULT_PATH) is False:
-            os.mkdir(MONTE_CARLO_RESULT_PATH)
-        plt.savefig(f'{MONTE_CARLO_RESULT_PATH}/value_func_episode({num_episode}).png')
-        plt.close()
\ No newline at end of file
+        get_renderer(self.rules).plot_sweep([self.get_value_function_plot(num_episode)], heatmap)
@@ -0,0 +1,151 @@
+import os
+import numpy as np
+import matplotlib.pyplot as plt
+from mpl_toolkits import mplot3d
+from constants import *
+from rules import DEFAULT_RULES
+
+class ValueFunctionRenderer(object):
+    """
+    ValueFunctionRenderer plots the optimal value function V*(s) = max_a Q(s, a) of the controllers. The 3D
+    surface figure and the 2D heatmap figure are created once and reused across calls, only their data is
+    replaced for every plot.
+    """
+    def __init__(self, rules=DEFAULT_RULES):
+        """
+        Initializes a renderer for value functions of games played with the provided rules.
+
+        Arguments:
+            rules (Easy21Rules): Rules of the game, the plot grids are derived from them.
+        """
+        self.rules = rules
+        dealer_card_value = np.arange(rules.min_card_value, rules.max_card_value+1)
+        player_card_sum = np.arange(rules.min_card_sum, rules.max_card_sum+1)
+        # create grid of dealer card value and player card sum on X and Y axis respectively.
+        self.X, self.Y = np.meshgrid(dealer_card_value, player_card_sum)
+
+        self._surface_figure = None
+        self._surface_axes = None
+        self._surface = None
+        self._heatmap_figure = None
+        self._heatmap_axes = None
+        self._heatmap = None
+        self._colorbar = None
+        # result directories that are known to exist.
+        self._directories = set()
+
+    def value_surface(self, state_action_values):
+        """
+        Returns V*(s) on the plot grid, i.e. an array of shape (num_player_sums, num_dealer_values).
+
+        Arguments:
+            state_action_values (numpy 3d array): State action values of shape rules.state_actions.
+        """
+        values = state_action_values[self.rules.min_card_value:, self.rules.min_card_sum:]
+        return np.max(values, axis=2).T
+
+    def plot_surface(self, state_action_values, title, path):
+        """
+        Plots V*(s) as a 3D surface and saves it as .png to the provided path.
+
+        Arguments:
+            state_action_values (numpy 3d array): State action values of shape rules.state_actions.
+            title (str): Title of the plot.
+            path (str): Path of the .png file.
+        """
+        Z = self.value_surface(state_action_values)
+        if self._surface_figure is None:
+            self._surface_figure = plt.figure(figsize=FIG_SIZE)
+            self._surface_axes = self._surface_figure.add_subplot(projection='3d')
+            self._surface_axes.set_xlabel('Dealer Showing')
+            self._surface_axes.set_ylabel('Player Sum')
+            self._surface_axes.set_zlabel('V*(s)')
+        if self._surface is not None:
+            self._surface.remove()
+        self._surface = self._surface_axes.plot_surface(self.X, self.Y, Z, rstride=1, cstride=1,
+                                                        cmap='viridis', edgecolor='none')
+        # the limits would otherwise keep growing with the previously plotted surfaces.
+        z_min, z_max = np.min(Z), np.max(Z)
+        self._surface_axes.set_zlim(z_min, z_max if z_max > z_min else z_min + 1)
+        self._surface_axes.set_title(title)
+        self._save(self._surface_figure, path)
+
+    def plot_heatmap(self, state_action_values, title, path):
+        """
+        Plots V*(s) as a 2D heatmap and saves it as .png to the provided path. This is much cheaper to render
+        than the 3D surface.
+
+        Arguments:
+            state_action_values (numpy 3d array): State action values of shape rules.state_actions.
+            title (str): Title of the plot.
+            path (str): Path of the .png file.
+        """
+        Z = self.value_surface(state_action_values)
+        if self._heatmap_figure is None:
+            self._heatmap_figure = plt.figure(figsize=FIG_SIZE)
+            self._heatmap_axes = self._heatmap_figure.add_subplot()
+            extent = (self.rules.min_card_value - 0.5, self.rules.max_card_value + 0.5,
+                      self.rules.min_card_sum - 0.5, self.rules.max_card_sum + 0.5)
+            self._heatmap = self._heatmap_axes.imshow(Z, origin='lower', extent=extent, aspect='auto',
+                                                      cmap='viridis')
+            self._colorbar = self._heatmap_figure.colorbar(self._heatmap, ax=self._heatmap_axes, label='V*(s)')
+            self._heatmap_axes.set_xlabel('Dealer Showing')
+            self._heatmap_axes.set_ylabel('Player Sum')
+        else:
+            self._heatmap.set_data(Z)
+        self._heatmap.set_clim(np.min(Z), np.max(Z))
+        self._heatmap_axes.set_title(title)
+        self._save(self._heatmap_figure, path)
+
+    def plot_sweep(self, plots, heatmap=False):
+        """
+        Plots the value functions of a whole sweep in one pass.
+
+        Arguments:
+            plots (list of (numpy 3d array, str, str)): The state action values, title and path of every plot.
+            heatmap (bool): Whether to also save a heatmap next to every surface, with a _heatmap suffix.
+        """
+        for state_action_values, title, path in plots:
+            self.plot_surface(state_action_values, title, path)
+            if heatmap:
+                self.plot_heatmap(state_action_values, title, heatmap_path(path))
+
+    def close(self):
+        """
+        Closes the figures of the renderer.
+        """
+        for figure in (self._surface_figure, self._heatmap_figure):
+            if figure is not None:
+                plt.close(figure)
+        self._surface_figure = self._surface_axes = self._surface = None
+        self._heatmap_figure = self._heatmap_axes = self._heatmap = self._colorbar = None
+
+    def _save(self, figure, path):
+        """
+        Saves the figure, creating its directory the first time it's used.
+        """
+        directory = os.path.dirname(path)
+        if directory and directory not in self._directories:
+            os.makedirs(directory, exist_ok=True)
+            self._directories.add(directory)
+        figure.savefig(path)
+
+
+def heatmap_path(path):
+    """
+    Returns the path of the heatmap saved next to the surface plot at the provided path.
+    """
+    root, ext = os.path.splitext(path)
+    return f'{root}_heatmap{ext}'
+
+
+# renderers shared by all the controllers, one per rules object.
+_renderers = {}
+
+def get_renderer(rules=DEFAULT_RULES):
+    """
+    Returns the shared renderer of value functions of games played with the provided rules.
+    """
+    if rules not in _renderers:
+        _renderers[rules] = ValueFunctionRenderer(rules)
+    return _renderers[rules]
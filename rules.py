@@ -0,0 +1,93 @@
+from constants import *
+
+class Easy21Rules(object):
+    """
+    Easy21Rules defines the rules of an Easy21 Game: the card deck, the dealer's policy and the bust limits.
+    The shapes of the controllers' tables, the LFA features and the plot grids are all derived from it.
+    """
+    def __init__(self, min_card_value=MIN_DEALER_CARD_VALUE, max_card_value=MAX_DEALER_CARD_VALUE,
+                 black_probability=BLACK_PROBABILITY, red_probability=RED_PROBABILITY,
+                 dealer_min_sum=MIN_DEALER_CARD_SUM, dealer_threshold=MAX_DEALER_CARD_SUM,
+                 min_card_sum=MIN_PLAYER_CARD_SUM, max_card_sum=MAX_PLAYER_CARD_SUM,
+                 dealer_brackets=DEALER_BRACKETS, player_brackets=PLAYER_BRACKETS, name='easy21'):
+        """
+        Initializes the rules of an Easy21 Game.
+
+        Arguments:
+            min_card_value (int): Smallest number value of a card.
+            max_card_value (int): Largest number value of a card.
+            black_probability (float): Probability of drawing a black card.
+            red_probability (float): Probability of drawing a red card.
+            dealer_min_sum (int): The dealer stops hitting once its card sum is at most this value.
+            dealer_threshold (int): The dealer stops hitting once its card sum is at least this value.
+            min_card_sum (int): A player (or dealer) whose card sum drops below this value goes bust.
+            max_card_sum (int): A player (or dealer) whose card sum exceeds this value goes bust.
+            dealer_brackets (list of (int, int)): Overlapping dealer card intervals used by the LFA features.
+            player_brackets (list of (int, int)): Overlapping player card sum intervals used by the LFA features.
+            name (str): Name of the rule variant.
+        """
+        if min_card_value < 1 or max_card_value < min_card_value:
+            raise ValueError('Invalid card value range [{}, {}]'.format(min_card_value, max_card_value))
+        if abs(black_probability + red_probability - 1) > 1e-9:
+            raise ValueError('Card color probabilities must sum to 1, got {} and {}'.format(black_probability,
+                                                                                           red_probability))
+        if min_card_sum < 1 or max_card_sum < max_card_value or min_card_sum > min_card_value:
+            raise ValueError('Invalid bust limits [{}, {}]'.format(min_card_sum, max_card_sum))
+        if dealer_threshold <= dealer_min_sum:
+            raise ValueError('Invalid dealer threshold {}'.format(dealer_threshold))
+
+        self.min_card_value = min_card_value
+        self.max_card_value = max_card_value
+        self.black_probability = black_probability
+        self.red_probability = red_probability
+        self.dealer_min_sum = dealer_min_sum
+        self.dealer_threshold = dealer_threshold
+        self.min_card_sum = min_card_sum
+        self.max_card_sum = max_card_sum
+        self.dealer_brackets = list(dealer_brackets)
+        self.player_brackets = list(player_brackets)
+        self.name = name
+
+        # tables are indexed directly by [dealer_card_value][player_card_sum], so index 0 is left unused.
+        self.states = (max_card_value + 1, max_card_sum + 1)
+        self.state_actions = self.states + (NUM_ACTIONS,)
+        self.num_dealer_values = max_card_value - min_card_value + 1
+        self.num_player_sums = max_card_sum - min_card_sum + 1
+        self.num_states = self.num_dealer_values*self.num_player_sums
+        self.num_state_actions = self.num_states*NUM_ACTIONS
+        self.feature_dim = (len(self.dealer_brackets)*len(self.player_brackets)*NUM_ACTIONS, 1)
+
+    @classmethod
+    def scaled(cls, factor):
+        """
+        Returns the Easy21 rules with card values, dealer threshold and bust limits scaled by the provided factor,
+        so the state space is factor^2 times larger. The LFA brackets are stretched to cover the new ranges.
+
+        Arguments:
+            factor (int): The scaling factor.
+        """
+        max_card_value = MAX_DEALER_CARD_VALUE*factor
+        max_card_sum = MAX_PLAYER_CARD_SUM*factor
+        return cls(max_card_value=max_card_value,
+                   dealer_threshold=MAX_DEALER_CARD_SUM*factor,
+                   max_card_sum=max_card_sum,
+                   dealer_brackets=_scale_brackets(DEALER_BRACKETS, MAX_DEALER_CARD_VALUE, max_card_value),
+                   player_brackets=_scale_brackets(PLAYER_BRACKETS, MAX_PLAYER_CARD_SUM, max_card_sum),
+                   name=f'easy21_x{factor**2}')
+
+
+def _scale_brackets(brackets, old_max, new_max):
+    """
+    Linearly stretches brackets defined over [1, old_max] to [1, new_max].
+    """
+    scale = lambda x: 1 + round((x - 1)*(new_max - 1)/(old_max - 1))
+    return [(scale(lo), scale(hi)) for lo, hi in brackets]
+
+
+DEFAULT_RULES = Easy21Rules()
+
+# Stress variants with 16x, 100x and 961x as many states as Easy21.
+STRESS_RULES = {rules.name: rules for rules in (Easy21Rules.scaled(4), Easy21Rules.scaled(10),
+                                                  Easy21Rules.scaled(31))}
+
+RULE_VARIANTS = {DEFAULT_RULES.name: DEFAULT_RULES, **STRESS_RULES}
@@ -1,21 +1,23 @@
 from controller import Easy21Controller
 from constants import *
+from plotting import get_renderer
+from rules import DEFAULT_RULES
 import numpy as np
-import matplotlib.pyplot as plt
-import os
 
 class SarsaController(Easy21Controller):
-    def __init__(self, lmbda = 0.0):
+    def __init__(self, lmbda = 0.0, rules=DEFAULT_RULES, rng=None):
         """
         Initialize a SARSA Controller for Easy21 Game.
         
         Arguments:
             lmbda (float): Lambda parameter to be used for weighting the future returns.
+            rules (Easy21Rules): Rules of the game.
+            rng (np.random.Generator): Generator used for exploration, the shared default generator if not provided.
         """
         # initiate base Easy21Controller class
-        super().__init__()
+        super().__init__(rules, rng)
         # initiate eligibility traces to zero for all state action values.
-        self.eligibility_trace = np.zeros(STATE_ACTIONS)
+        self.eligibility_trace = np.zeros(self.rules.state_actions)
         # lmbda represents the lambda parameter of the Sarsa controller.
         self.lmbda = lmbda
     
@@ -47,8 +49,8 @@ class SarsaController(Easy21Controller):
         self.state_action_count[pi][pj][pk] += 1
 
         # update state action values for all state and action pairs.
-        for i in range(MIN_DEALER_CARD_VALUE, MAX_DEALER_CARD_VALUE + 1):
-            for j in range(MIN_PLAYER_CARD_SUM, MAX_PLAYER_CARD_SUM + 1):
+        for i in range(self.rules.min_card_value, self.rules.max_card_value + 1):
+            for j in range(self.rules.min_card_sum, self.rules.max_card_sum + 1):
                 for k in range(NUM_ACTIONS):
                     # ignoring updates for (state, actions) that have not been observed yet.
                     count = self.state_action_count[i][j][k]
@@ -61,7 +63,7 @@ class SarsaController(Easy21Controller):
         """
         Clears eligibility traces after end of each episode.
         """
-        self.eligibility_trace = np.zeros(STATE_ACTIONS)
+        self.eligibility_trace = np.zeros(self.rules.state_actions)
         
     def compute_mean_squared_error(self, optimal_state_action_value):
         """
@@ -75,42 +77,26 @@ class SarsaController(Easy21Controller):
             mean squared error (float): The mean sqaured error between the provided optimal state action 
                 values and self computed action values. 
         """
-        all_state_actions = MAX_DEALER_CARD_VALUE*MAX_PLAYER_CARD_SUM*NUM_ACTIONS
-        return np.sum(np.square(optimal_state_action_value - self.state_action_value))/all_state_actions
+        return np.sum(np.square(optimal_state_action_value - self.state_action_value))/self.rules.num_state_actions
     
-    def plot_value_function(self, num_episode):
+    def get_value_function_plot(self, num_episode):
+        """
+        Returns the state action values, title and path of the value function plot for the given episode number.
+
+        Arguments:
+            num_episode (int): The current episode number of the Easy21 game.
+        """
+        return (self.state_action_value.copy(), f'V* [λ = {self.lmbda}, {num_episode} episodes]',
+                f'{SARSA_RESULT_PATH}/value_func_λ({self.lmbda})_episode({num_episode}).png')
+
+    def plot_value_function(self, num_episode, heatmap=False):
         """
         Plots the action value function and saves them as .png for the given episode number.
 
         Arguments:
             num_episode (int): The current episode number of the Easy21 game.
+            heatmap (bool): Whether to also save the value function as a heatmap.
         """
         print('')
         print(f'Plotting value function for Sarsa(λ={self.lmbda})')
-
-        dealer_card_value = np.arange(MIN_DEALER_CARD_VALUE, MAX_DEALER_CARD_VALUE+1)
-        player_card_sum = np.arange(MIN_PLAYER_CARD_SUM, MAX_PLAYER_CARD_SUM+1)
-
-        # create grid of dealer card value and player card sum on X and Y axis respectively.
-        X, Y = np.meshgrid(dealer_card_value, player_card_sum)
-        # initiate z-axis as zeros to plot optimal value function.
-        Z = np.zeros((21, 10))
-        for i in range(21):
-            for j in range(10):
-                idx = X[i][j]
-                idy = Y[i][j]
-                Z[i][j] = np.max(self.state_action_value[idx][idy])
-        # plot optimal value functions.
-        plt.figure(figsize=FIG_SIZE)
-        ax = plt.axes(projection='3d')
-        ax.plot_surface(X, Y, Z, rstride=1, cstride=1,
-                cmap='viridis', edgecolor='none')
-        ax.set_xlabel('Dealer Showing')
-        ax.set_ylabel('Player Sum')
-        ax.set_zlabel('V*(s)')
-        ax.set_title(f'V* [λ = {self.lmbda}, {num_episode} episodes]')
-        #save figure
-        if os.path.isdir(SARSA_RESULT_PATH) is False:
-            os.mkdir(SARSA_RESULT_PATH)
-        plt.savefig(f'{SARSA_RESULT_PATH}/value_func_λ({self.lmbda})_episode({num_episode}).png')
-        plt.close()
+        get_renderer(self.rules).plot_sweep([self.get_value_function_plot(num_episode)], heatmap)
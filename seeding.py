@@ -0,0 +1,80 @@
+import zlib
+import numpy as np
+
+# spawn key namespace of the named streams, keeps them apart from the children created by spawn.
+NAMED_STREAM_NAMESPACE = 2**32
+
+class RandomStreams(object):
+    """
+    RandomStreams derives independent, reproducible random number streams from a single seed using
+    np.random.SeedSequence. Every environment, controller and worker gets its own named stream, so adding
+    or removing one of them doesn't shift the random numbers seen by the others.
+
+    In common random numbers mode every environment stream is the same, whatever its name. Controllers being
+    compared then play the same card sequences, which removes most of the noise from their comparison.
+    """
+    def __init__(self, seed=None, common_random_numbers=False):
+        """
+        Initializes the random streams.
+
+        Arguments:
+            seed (int or np.random.SeedSequence): Root seed of the streams, if not provided fresh entropy is used.
+            common_random_numbers (bool): Whether every environment stream is the same.
+        """
+        if isinstance(seed, np.random.SeedSequence):
+            self.seed_sequence = seed
+        else:
+            self.seed_sequence = np.random.SeedSequence(seed)
+        self.common_random_numbers = common_random_numbers
+
+    def seed_sequence_for(self, *key):
+        """
+        Returns the seed sequence of the stream with the provided name. The same name always gives the same
+        seed sequence.
+
+        Arguments:
+            key: Parts of the stream name, e.g. ('sarsa', 0.5). Each part is an int or is hashed from its string.
+        """
+        spawn_key = tuple(part if isinstance(part, int) and part >= 0 else zlib.crc32(str(part).encode('utf-8'))
+                          for part in key)
+        return np.random.SeedSequence(self.seed_sequence.entropy,
+                                      spawn_key=self.seed_sequence.spawn_key + (NAMED_STREAM_NAMESPACE,) + spawn_key)
+
+    def environment(self, *key):
+        """
+        Returns the seed sequence of the environment with the provided name, to be passed as Easy21's seed.
+        In common random numbers mode the name is ignored.
+        """
+        if self.common_random_numbers:
+            return self.seed_sequence_for('environment')
+        return self.seed_sequence_for('environment', *key)
+
+    def controller(self, *key):
+        """
+        Returns the random number generator used by the controller with the provided name for exploration.
+        """
+        return np.random.default_rng(self.seed_sequence_for('controller', *key))
+
+    def spawn(self, n):
+        """
+        Returns n independent child streams, e.g. one for each parallel worker.
+        """
+        return [RandomStreams(child, self.common_random_numbers) for child in self.seed_sequence.spawn(n)]
+
+
+# generator used when no generator is provided, it replaces the global np.random state.
+_default_rng = np.random.default_rng()
+
+def default_rng():
+    """
+    Returns the shared generator used by cards and controllers that were not given their own.
+    """
+    return _default_rng
+
+
+def seed(entropy=None):
+    """
+    Reseeds the shared generator returned by default_rng. Cards and controllers created afterwards use it.
+    """
+    global _default_rng
+    _default_rng = np.random.default_rng(entropy)
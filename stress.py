@@ -0,0 +1,51 @@
+from easy_21 import Easy21
+from sarsa import SarsaController
+from lfa import LFAController
+from model import Easy21Model
+from evaluation import PolicyEvaluator
+from training import train_td_controller
+from rules import RULE_VARIANTS
+from constants import *
+import numpy as np
+import time
+
+# Measures how the controllers, the LFA features, the mean squared error computation and the exact model scale
+# with the size of the state space of the Easy21 rule variants.
+for name, rules in RULE_VARIANTS.items():
+    print(f'Rules {name}: {rules.num_states:,} states')
+    env = Easy21(rules)
+    reference = np.zeros(rules.state_actions)
+
+    start = time.perf_counter()
+    sarsa_controller = SarsaController(lmbda=0.5, rules=rules)
+    train_td_controller(env, sarsa_controller, NUM_STRESS_EPISODES)
+    print(f'  Sarsa(λ) training: {(time.perf_counter() - start)/NUM_STRESS_EPISODES*1000:.2f} ms/episode')
+
+    start = time.perf_counter()
+    sarsa_controller.compute_mean_squared_error(reference)
+    print(f'  Sarsa(λ) mean squared error: {(time.perf_counter() - start)*1000:.2f} ms')
+
+    start = time.perf_counter()
+    lfa_controller = LFAController(lmbda=0.5, rules=rules)
+    print(f'  LFA feature map: {(time.perf_counter() - start)*1000:.2f} ms')
+
+    start = time.perf_counter()
+    train_td_controller(env, lfa_controller, NUM_STRESS_EPISODES)
+    print(f'  LFA training: {(time.perf_counter() - start)/NUM_STRESS_EPISODES*1000:.2f} ms/episode')
+
+    start = time.perf_counter()
+    lfa_controller.compute_mean_squared_error(reference)
+    print(f'  LFA mean squared error: {(time.perf_counter() - start)*1000:.2f} ms')
+
+    start = time.perf_counter()
+    evaluation = PolicyEvaluator(rules=rules).evaluate_controller(lfa_controller)
+    print(f'  Policy evaluation ({evaluation.num_games:,} games): {(time.perf_counter() - start)*1000:.2f} ms')
+
+    # the hit transition matrix has one entry per state and signed card value.
+    if rules.num_states*2*rules.max_card_value > MAX_STRESS_MODEL_ENTRIES:
+        print('  Exact model: skipped, too many transitions')
+        continue
+    start = time.perf_counter()
+    model = Easy21Model(rules)
+    model.evaluate_controller(lfa_controller)
+    print(f'  Exact model and policy solve: {(time.perf_counter() - start)*1000:.2f} ms')
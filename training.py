@@ -0,0 +1,48 @@
+def train_td_controller(env, controller, num_episodes, optimal_state_action_value=None, mse_interval=1,
+                        verbose=False):
+    """
+    Trains a Sarsa(λ) controller (tabular or LFA) by playing the provided number of Easy21 episodes.
+
+    Arguments:
+        env (Easy21): The Easy21 environment.
+        controller (SarsaController or LFAController): The controller to train.
+        num_episodes (int): Number of episodes to play.
+        optimal_state_action_value (numpy 3d array): If provided, the mean squared error of the controller w.r.t
+            these values is recorded every mse_interval episodes.
+        mse_interval (int): Number of episodes between two mean squared error samples.
+        verbose (bool): Whether to print the episode progress.
+
+    Returns:
+        mean_squared_errors (list of float): The sampled mean squared errors, empty if no optimal values are
+            provided.
+    """
+    mean_squared_errors = []
+    for e in range(1, num_episodes+1):
+        if verbose:
+            print(f'Episode {e:,}/{num_episodes:,} done.', end='\r')
+
+        # clear eligibility traces.
+        controller.clear_eligibility_traces()
+
+        # get initital state and action.
+        prev_state = env.initialize_game()
+        prev_action = controller.get_action(prev_state)
+
+        # play game till termination.
+        while prev_state.is_terminal() == False:
+            # execute one step in the environment.
+            curr_state, reward = env.step(prev_state, prev_action)
+            # get action for current state.
+            curr_action = controller.get_action(curr_state)
+
+            # update policy based on prev and current state actions.
+            controller.update_policy(prev_state, prev_action, curr_state, curr_action, reward)
+
+            # swap prev state-action with current state-action.
+            prev_state, prev_action = curr_state, curr_action
+
+        # compute mean square error of the controller value function with optimal (monte-carlo) value function.
+        if optimal_state_action_value is not None and e % mse_interval == 0:
+            mean_squared_errors.append(controller.compute_mean_squared_error(optimal_state_action_value))
+
+    return mean_squared_errors